@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import json
+import random
+import string
+import timeit
+
+from gamdl import utils
+
+
+def random_string(length: int) -> str:
+    return "".join(random.choices(string.ascii_letters + string.digits, k=length))
+
+
+def get_track(track_id: int) -> dict:
+    return {
+        "id": str(track_id),
+        "type": "songs",
+        "href": f"/v1/catalog/us/songs/{track_id}",
+        "attributes": {
+            "albumName": random_string(24),
+            "artistName": random_string(16),
+            "artwork": {
+                "width": 3000,
+                "height": 3000,
+                "url": f"https://is1-ssl.mzstatic.com/image/thumb/{random_string(80)}/{{w}}x{{h}}bb.jpg",
+                "bgColor": "1a1a1a",
+                "textColor1": "ffffff",
+            },
+            "composerName": random_string(32),
+            "discNumber": 1,
+            "durationInMillis": random.randint(120000, 360000),
+            "extendedAssetUrls": {
+                "plus": f"https://aod.itunes.apple.com/{random_string(120)}.m3u8",
+                "lightweight": f"https://aod.itunes.apple.com/{random_string(120)}.m3u8",
+                "superLightweight": f"https://aod.itunes.apple.com/{random_string(120)}.m3u8",
+                "lightweightPlus": f"https://aod.itunes.apple.com/{random_string(120)}.m3u8",
+                "enhancedHls": f"https://aod.itunes.apple.com/{random_string(120)}.m3u8",
+            },
+            "genreNames": ["Pop", "Music"],
+            "hasLyrics": True,
+            "isrc": random_string(12),
+            "name": random_string(20),
+            "playParams": {"id": str(track_id), "kind": "song"},
+            "previews": [
+                {"url": f"https://audio-ssl.itunes.apple.com/{random_string(100)}.m4a"}
+            ],
+            "releaseDate": "2024-01-01",
+            "trackNumber": 1,
+            "url": f"https://music.apple.com/us/album/{random_string(20)}/{track_id}",
+        },
+    }
+
+
+def main():
+    page = json.dumps(
+        {
+            "next": "/v1/catalog/us/playlists/pl.0/tracks?offset=300",
+            "data": [get_track(track_id) for track_id in range(300)],
+        }
+    ).encode()
+    number = 50
+
+    print(f"Playlist page size: {len(page) / 1024 / 1024:.2f} MiB, {number} runs")
+    results = {
+        "json (decoded twice)": timeit.timeit(
+            lambda: (json.loads(page), json.loads(page)),
+            number=number,
+        ),
+        "json (decoded once)": timeit.timeit(
+            lambda: json.loads(page),
+            number=number,
+        ),
+    }
+    if utils.orjson is not None:
+        results["orjson (decoded once)"] = timeit.timeit(
+            lambda: utils.orjson.loads(page),
+            number=number,
+        )
+    if utils.msgspec is not None:
+        results["msgspec (decoded once)"] = timeit.timeit(
+            lambda: utils.msgspec.json.decode(page),
+            number=number,
+        )
+
+    baseline = results["json (decoded twice)"]
+    for name, elapsed in results.items():
+        print(
+            f"{name:<24} {elapsed / number * 1000:8.2f} ms/page "
+            f"{baseline / elapsed:6.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
 from .apple_music_api import AppleMusicApi
+from .apple_music_api_async import AsyncAppleMusicApi
 from .downloader import Downloader
 from .downloader_music_video import DownloaderMusicVideo
 from .downloader_post import DownloaderPost
 from .downloader_song import DownloaderSong
 from .itunes_api import ItunesApi
+from .itunes_api_async import AsyncItunesApi
 
 __version__ = "2.6.5"
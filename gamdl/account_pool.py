@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+
+import requests
+
+from .enums import ApiEndpoint
+from .rate_limiter import RATE_LIMITER_SETTINGS, RateLimiter
+
+logger = logging.getLogger("gamdl")
+
+POOLED_ENDPOINTS = (ApiEndpoint.WEBPLAYBACK, ApiEndpoint.LICENSE)
+
+
+class PooledAccount:
+    def __init__(
+        self,
+        session: requests.Session,
+        media_user_token: str,
+        name: str,
+    ):
+        self.session = session
+        self.media_user_token = media_user_token
+        self.name = name
+        self.rate_limiters = {
+            endpoint: RateLimiter(
+                **RATE_LIMITER_SETTINGS[endpoint],
+                name=f"{endpoint.value} ({name})",
+            )
+            for endpoint in POOLED_ENDPOINTS
+        }
+        self.failure_count = 0
+        self.disabled_until = 0.0
+
+
+class AccountPool:
+    FAILURE_THRESHOLD = 3
+    COOLDOWN = 10 * 60
+
+    def __init__(self, accounts: list[PooledAccount]):
+        self.accounts = accounts
+        self._index = 0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> PooledAccount:
+        with self._lock:
+            now = time.monotonic()
+            for i in range(len(self.accounts)):
+                account_index = (self._index + i) % len(self.accounts)
+                account = self.accounts[account_index]
+                if account.disabled_until <= now:
+                    self._index = account_index + 1
+                    return account
+            return min(self.accounts, key=lambda account: account.disabled_until)
+
+    def record_success(self, account: PooledAccount) -> None:
+        with self._lock:
+            account.failure_count = 0
+
+    def record_failure(self, account: PooledAccount) -> None:
+        with self._lock:
+            account.failure_count += 1
+            if account.failure_count < self.FAILURE_THRESHOLD:
+                return
+            account.failure_count = 0
+            account.disabled_until = time.monotonic() + self.COOLDOWN
+        logger.warning(
+            f'Account "{account.name}" keeps failing, '
+            f"taking it out of rotation for {self.COOLDOWN}s"
+        )
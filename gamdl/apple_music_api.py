@@ -1,16 +1,30 @@
 from __future__ import annotations
 
-import functools
+import itertools
+import logging
 import re
+import threading
 import time
 import typing
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from http.cookiejar import MozillaCookieJar
 from pathlib import Path
-from urllib.parse import urlparse
+from urllib.parse import parse_qs, urlparse
 
 import requests
 
-from .utils import raise_response_exception
+from .account_pool import POOLED_ENDPOINTS, AccountPool, PooledAccount
+from .enums import ApiEndpoint
+from .hedging import get_hedger
+from .memory_cache import MemoryCache
+from .metadata_cache import MetadataCache
+from .retry import call_endpoint
+from .token_store import TokenStore
+from .transport import get_transport
+from .utils import parse_json, raise_response_exception
+
+logger = logging.getLogger("gamdl")
 
 
 class AppleMusicApi:
@@ -20,17 +34,50 @@ class AppleMusicApi:
         "https://play.itunes.apple.com/WebObjects/MZPlay.woa/wa/webPlayback"
     )
     LICENSE_API_URL = "https://play.itunes.apple.com/WebObjects/MZPlay.woa/wa/acquireWebPlaybackLicense"
-    WAIT_TIME = 2
+    SESSION_HEADERS = {
+        "accept": "*/*",
+        "accept-language": "en-US",
+        "origin": APPLE_MUSIC_HOMEPAGE_URL,
+        "priority": "u=1, i",
+        "referer": APPLE_MUSIC_HOMEPAGE_URL,
+        "sec-ch-ua": '"Google Chrome";v="137", "Chromium";v="137", "Not/A)Brand";v="24"',
+        "sec-ch-ua-mobile": "?0",
+        "sec-ch-ua-platform": '"Windows"',
+        "sec-fetch-dest": "empty",
+        "sec-fetch-mode": "cors",
+        "sec-fetch-site": "same-site",
+        "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36",
+    }
+    MAX_PAGE_WORKERS = 4
+    DEVELOPER_TOKEN_REFRESH_INTERVAL = 5 * 60
+    ACCOUNT_FAILURE_STATUS_CODES = (401, 403, 429)
+    MAX_IDS_PER_REQUEST = {
+        "songs": 300,
+        "music-videos": 300,
+        "albums": 100,
+    }
+    ALBUM_CACHE_MAX_ENTRIES = 128
+    ALBUM_CACHE_TTL = 60 * 60
 
     def __init__(
         self,
         storefront: str,
         media_user_token: str | None = None,
         language: str = "en-US",
+        developer_token_path: Path = None,
+        metadata_cache_path: Path = None,
+        hedge_requests: bool = False,
+        additional_media_user_tokens: list[str] = None,
     ):
         self.media_user_token = media_user_token
         self.storefront = storefront
         self.language = language
+        self.developer_token_path = developer_token_path
+        self.metadata_cache_path = metadata_cache_path
+        self.hedge_requests = hedge_requests
+        self.additional_media_user_tokens = additional_media_user_tokens
+        self._set_metadata_cache()
+        self._set_album_cache()
         self._set_session()
 
     @classmethod
@@ -38,7 +85,26 @@ class AppleMusicApi:
         cls,
         cookies_path: Path = Path("./cookies.txt"),
         language: str = "en-US",
+        developer_token_path: Path = Path.home() / ".gamdl" / "developer_token.json",
+        metadata_cache_path: Path = None,
+        hedge_requests: bool = False,
+        additional_cookies_paths: list[Path] = None,
     ) -> AppleMusicApi:
+        return cls(
+            storefront=None,
+            media_user_token=cls._get_media_user_token(cookies_path),
+            language=language,
+            developer_token_path=developer_token_path,
+            metadata_cache_path=metadata_cache_path,
+            hedge_requests=hedge_requests,
+            additional_media_user_tokens=[
+                cls._get_media_user_token(additional_cookies_path)
+                for additional_cookies_path in additional_cookies_paths or []
+            ],
+        )
+
+    @classmethod
+    def _get_media_user_token(cls, cookies_path: Path) -> str:
         parse_cookie = lambda name: next(
             (
                 cookie.value
@@ -57,36 +123,112 @@ class AppleMusicApi:
         media_user_token = parse_cookie("media-user-token")
         if not media_user_token:
             raise ValueError(
-                '"media-user-token" cookie not found in cookies. '
+                f'"media-user-token" cookie not found in "{cookies_path}". '
                 "Make sure you have exported the cookies from Apple Music webpage and are logged in "
                 "with an active subscription."
             )
-
-        return cls(
-            storefront=None,
-            media_user_token=media_user_token,
-            language=language,
+        return media_user_token
+
+    def _set_metadata_cache(self):
+        if self.metadata_cache_path is not None:
+            self.metadata_cache = MetadataCache(self.metadata_cache_path)
+        else:
+            self.metadata_cache = None
+
+    def _set_album_cache(self):
+        self.album_cache = MemoryCache(
+            max_entries=self.ALBUM_CACHE_MAX_ENTRIES,
+            ttl=self.ALBUM_CACHE_TTL,
+            name="Album",
         )
 
     def _set_session(self):
-        self.session = requests.Session()
-        self.session.headers.update(
-            {
-                "accept": "*/*",
-                "accept-language": "en-US",
-                "origin": self.APPLE_MUSIC_HOMEPAGE_URL,
-                "priority": "u=1, i",
-                "referer": self.APPLE_MUSIC_HOMEPAGE_URL,
-                "sec-ch-ua": '"Google Chrome";v="137", "Chromium";v="137", "Not/A)Brand";v="24"',
-                "sec-ch-ua-mobile": "?0",
-                "sec-ch-ua-platform": '"Windows"',
-                "sec-fetch-dest": "empty",
-                "sec-fetch-mode": "cors",
-                "sec-fetch-site": "same-site",
-                "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36",
-            }
-        )
+        self.session = get_transport().create_session()
+        self.session.headers.update(self.SESSION_HEADERS)
+        self.account_pool = None
+
+        self._set_token_store()
+        self._set_developer_token()
+        self.session.params = {"l": self.language}
+
+        if self.media_user_token:
+            self.session.cookies.update(
+                {
+                    "media-user-token": self.media_user_token,
+                }
+            )
+            self._set_account_info()
+        self._set_account_pool()
+
+    def _set_account_pool(self):
+        if not self.additional_media_user_tokens:
+            self.account_pool = None
+            return
+
+        accounts = [PooledAccount(self.session, self.media_user_token, "1")]
+        for account_index, media_user_token in enumerate(
+            self.additional_media_user_tokens,
+            start=2,
+        ):
+            session = get_transport().create_session()
+            session.headers = self.session.headers
+            session.params = self.session.params
+            session.cookies.update({"media-user-token": media_user_token})
+            try:
+                account_info = self._check_amp_api_response(
+                    self._request(
+                        "GET",
+                        f"{self.AMP_API_URL}/v1/me/account",
+                        session=session,
+                        params={"meta": "subscription"},
+                    )
+                )
+            except Exception as e:
+                logger.warning(
+                    f'Failed to get account info of account "{account_index}", '
+                    f"skipping it: {e}"
+                )
+                continue
+            subscription = account_info["meta"]["subscription"]
+            if not subscription["active"]:
+                logger.warning(
+                    f'Account "{account_index}" has no active subscription, skipping it'
+                )
+                continue
+            if subscription["storefront"] != self.storefront:
+                logger.warning(
+                    f'Account "{account_index}" is from storefront '
+                    f'"{subscription["storefront"]}" instead of "{self.storefront}", '
+                    "skipping it"
+                )
+                continue
+            accounts.append(
+                PooledAccount(session, media_user_token, str(account_index))
+            )
+        self.account_pool = AccountPool(accounts)
+
+    def _set_token_store(self):
+        self._token_lock = threading.Lock()
+        self._developer_token_refreshed_at = None
+        if self.developer_token_path is not None:
+            self.token_store = TokenStore(self.developer_token_path)
+        else:
+            self.token_store = None
+
+    def _set_developer_token(self, refresh: bool = False):
+        token = None
+        if self.token_store is not None and not refresh:
+            token = self.token_store.load()
+
+        if token is None:
+            logger.debug("Fetching developer token from Apple Music webpage")
+            token = self._fetch_developer_token()
+            if self.token_store is not None:
+                self.token_store.save(token)
+
+        self.session.headers.update({"authorization": f"Bearer {token}"})
 
+    def _fetch_developer_token(self) -> str:
         home_page = self.session.get(self.APPLE_MUSIC_HOMEPAGE_URL).text
         index_js_uri = re.search(
             r"/(assets/index-legacy[~-][^/\"]+\.js)",
@@ -95,43 +237,196 @@ class AppleMusicApi:
         index_js_page = self.session.get(
             f"{self.APPLE_MUSIC_HOMEPAGE_URL}/{index_js_uri}"
         ).text
-        token = re.search('(?=eyJh)(.*?)(?=")', index_js_page).group(1)
+        return re.search('(?=eyJh)(.*?)(?=")', index_js_page).group(1)
 
-        self.session.headers.update({"authorization": f"Bearer {token}"})
-        self.session.params = {"l": self.language}
+    def _send_request(
+        self,
+        method: str,
+        url: str,
+        session: requests.Session = None,
+        **kwargs,
+    ) -> requests.Response:
+        session = session or self.session
+        authorization = self.session.headers.get("authorization")
+        response = session.request(method, url, **kwargs)
+
+        if response.status_code == 401:
+            with self._token_lock:
+                if (
+                    self.session.headers.get("authorization") == authorization
+                    and self._should_refresh_developer_token()
+                ):
+                    logger.debug("Developer token was rejected, refreshing it")
+                    self._set_developer_token(refresh=True)
+                    self._developer_token_refreshed_at = time.monotonic()
+            if self.session.headers.get("authorization") != authorization:
+                response = session.request(method, url, **kwargs)
+
+        return response
+
+    def _should_refresh_developer_token(self) -> bool:
+        token = self.session.headers.get("authorization", "").split(" ")[-1]
+        expires_at = TokenStore.get_token_expiry(token)
+        if (
+            expires_at is not None
+            and expires_at - TokenStore.EXPIRY_MARGIN <= time.time()
+        ):
+            return True
+        return (
+            self._developer_token_refreshed_at is None
+            or time.monotonic() - self._developer_token_refreshed_at
+            >= self.DEVELOPER_TOKEN_REFRESH_INTERVAL
+        )
 
-        if self.media_user_token:
-            self.session.cookies.update(
-                {
-                    "media-user-token": self.media_user_token,
-                }
-            )
-            self._set_account_info()
+    def _get_endpoint(self, url: str) -> ApiEndpoint:
+        if url.startswith(self.WEBPLAYBACK_API_URL):
+            return ApiEndpoint.WEBPLAYBACK
+        if url.startswith(self.LICENSE_API_URL):
+            return ApiEndpoint.LICENSE
+        return ApiEndpoint.AMP_API
+
+    def _request(
+        self,
+        method: str,
+        url: str,
+        hedge: bool = False,
+        **kwargs,
+    ) -> requests.Response:
+        endpoint = self._get_endpoint(url)
+        kwargs.setdefault("timeout", get_transport().get_timeout(endpoint))
+        if self.account_pool is not None and endpoint in POOLED_ENDPOINTS:
+            return self._request_pooled(endpoint, method, url, **kwargs)
+        send = lambda: self._send_request(method, url, **kwargs)
+        if hedge and self.hedge_requests:
+            return get_hedger(endpoint).call(send)
+        return call_endpoint(endpoint, send)
+
+    def _request_pooled(
+        self,
+        endpoint: ApiEndpoint,
+        method: str,
+        url: str,
+        **kwargs,
+    ) -> requests.Response:
+        for attempt in range(len(self.account_pool.accounts)):
+            is_last_attempt = attempt == len(self.account_pool.accounts) - 1
+            account = self.account_pool.acquire()
+            try:
+                response = call_endpoint(
+                    endpoint,
+                    lambda: self._send_request(
+                        method,
+                        url,
+                        session=account.session,
+                        **kwargs,
+                    ),
+                    account.rate_limiters[endpoint],
+                )
+            except requests.RequestException:
+                self.account_pool.record_failure(account)
+                if is_last_attempt:
+                    raise
+                continue
+            if (
+                response.status_code >= 500
+                or response.status_code in self.ACCOUNT_FAILURE_STATUS_CODES
+            ):
+                self.account_pool.record_failure(account)
+                if is_last_attempt:
+                    return response
+                continue
+            self.account_pool.record_success(account)
+            return response
 
     def _set_account_info(self):
         self.account_info = self.get_account_info()
         self.storefront = self.account_info["meta"]["subscription"]["storefront"]
 
-    def _check_amp_api_response(self, response: requests.Response) -> None:
+    def _get_cache_resource_type(self, url: str) -> str | None:
+        path_parts = urlparse(url).path.split("/")
+        if len(path_parts) > 4 and path_parts[2] == "catalog":
+            return path_parts[4]
+        return None
+
+    def _get_amp_api_json(
+        self,
+        url: str,
+        params: dict = None,
+        allow_empty: bool = False,
+    ) -> dict | None:
+        resource_type = self._get_cache_resource_type(url)
+        cache_key = None
+        cache_entry = None
+        headers = {}
+        if self.metadata_cache is not None and resource_type is not None:
+            cache_key = self.metadata_cache.get_key(self.language, url, params)
+            cache_entry = self.metadata_cache.get(cache_key)
+            if cache_entry is not None and not cache_entry.is_expired():
+                return cache_entry.data
+            if cache_entry is not None and cache_entry.etag:
+                headers["if-none-match"] = cache_entry.etag
+
+        response = self._request(
+            "GET",
+            url,
+            hedge=True,
+            params=params,
+            headers=headers,
+        )
+        if response.status_code == 304 and cache_entry is not None:
+            self.metadata_cache.touch(cache_key, resource_type)
+            return cache_entry.data
+        if response.status_code == 404:
+            return None
+        response_dict = self._check_amp_api_response(response, allow_empty)
+        if cache_key is not None:
+            self.metadata_cache.set(
+                cache_key,
+                response_dict,
+                resource_type,
+                response.headers.get("etag"),
+            )
+        return response_dict
+
+    @staticmethod
+    def _get_fields_params(fields: dict[str, str] | None) -> dict[str, str]:
+        if not fields:
+            return {}
+        return {
+            f"fields[{resource_type}]": resource_fields
+            for resource_type, resource_fields in fields.items()
+        }
+
+    def _check_amp_api_response(
+        self,
+        response: requests.Response,
+        allow_empty: bool = False,
+    ) -> dict:
         try:
             response.raise_for_status()
-            response_dict = response.json()
-            assert response_dict.get("data") or response_dict.get("results") is not None
+            response_dict = parse_json(response.content)
+            assert (
+                response_dict.get("data")
+                or response_dict.get("results") is not None
+                or (allow_empty and response_dict.get("data") is not None)
+            )
         except (
             requests.HTTPError,
-            requests.exceptions.JSONDecodeError,
+            ValueError,
             AssertionError,
         ):
             raise_response_exception(response)
+        return response_dict
 
     def get_account_info(self, meta: str = "subscription") -> dict:
-        response = self.session.get(
+        response = self._request(
+            "GET",
             f"{self.AMP_API_URL}/v1/me/account",
             params={"meta": meta},
         )
-        self._check_amp_api_response(response)
+        response_dict = self._check_amp_api_response(response)
 
-        return response.json()
+        return response_dict
 
     def get_artist(
         self,
@@ -139,25 +434,27 @@ class AppleMusicApi:
         include: str = "albums,music-videos",
         limit: int = 100,
         fetch_all: bool = True,
+        fields: dict[str, str] = None,
     ) -> dict | None:
-        response = self.session.get(
+        response_dict = self._get_amp_api_json(
             f"{self.AMP_API_URL}/v1/catalog/{self.storefront}/artists/{artist_id}",
             params={
                 "include": include,
                 **{f"limit[{_include}]": limit for _include in include.split(",")},
+                **self._get_fields_params(fields),
             },
         )
-        if response.status_code == 404:
+        if response_dict is None:
             return None
-        self._check_amp_api_response(response)
 
-        artist = response.json()["data"][0]
+        artist = response_dict["data"][0]
         if fetch_all:
             for _include in include.split(","):
                 for additional_data in self._extend_api_data(
                     artist["relationships"][_include],
                     limit,
                     "",
+                    fields,
                 ):
                     artist["relationships"][_include]["data"].extend(additional_data)
         return artist
@@ -168,66 +465,146 @@ class AppleMusicApi:
         extend: str = "extendedAssetUrls",
         include: str = "lyrics,albums",
     ) -> dict | None:
-        response = self.session.get(
+        response_dict = self._get_amp_api_json(
             f"{self.AMP_API_URL}/v1/catalog/{self.storefront}/songs/{song_id}",
             params={
                 "include": include,
                 "extend": extend,
             },
         )
-        if response.status_code == 404:
+        if response_dict is None:
             return None
-        self._check_amp_api_response(response)
 
-        return response.json()["data"][0]
+        return response_dict["data"][0]
 
     def get_music_video(
         self,
         music_video_id: str,
         include: str = "albums",
     ) -> dict | None:
-        response = self.session.get(
+        response_dict = self._get_amp_api_json(
             f"{self.AMP_API_URL}/v1/catalog/{self.storefront}/music-videos/{music_video_id}",
             params={
                 "include": include,
             },
         )
-        if response.status_code == 404:
+        if response_dict is None:
             return None
-        self._check_amp_api_response(response)
 
-        return response.json()["data"][0]
+        return response_dict["data"][0]
 
     def get_post(
         self,
         post_id: str,
     ) -> dict | None:
-        response = self.session.get(
-            f"{self.AMP_API_URL}/v1/catalog/{self.storefront}/uploaded-videos/{post_id}"
+        response_dict = self._get_amp_api_json(
+            f"{self.AMP_API_URL}/v1/catalog/{self.storefront}/uploaded-videos/{post_id}",
         )
-        if response.status_code == 404:
+        if response_dict is None:
             return None
-        self._check_amp_api_response(response)
 
-        return response.json()["data"][0]
+        return response_dict["data"][0]
 
-    @functools.lru_cache()
     def get_album(
         self,
         album_id: str,
         extend: str = "extendedAssetUrls",
+        fields: dict[str, str] = None,
+    ) -> dict | None:
+        return self.album_cache.get_or_set(
+            (album_id, extend, tuple(sorted(fields.items())) if fields else None),
+            lambda: self._get_album(album_id, extend, fields),
+        )
+
+    def _get_album(
+        self,
+        album_id: str,
+        extend: str,
+        fields: dict[str, str],
     ) -> dict | None:
-        response = self.session.get(
+        response_dict = self._get_amp_api_json(
             f"{self.AMP_API_URL}/v1/catalog/{self.storefront}/albums/{album_id}",
             params={
                 "extend": extend,
+                **self._get_fields_params(fields),
             },
         )
-        if response.status_code == 404:
+        if response_dict is None:
             return None
-        self._check_amp_api_response(response)
 
-        return response.json()["data"][0]
+        return response_dict["data"][0]
+
+    def _get_resources(
+        self,
+        resource_type: str,
+        resource_ids: list[str],
+        params: dict,
+    ) -> list[dict]:
+        max_ids = self.MAX_IDS_PER_REQUEST.get(resource_type, 100)
+        resource_ids_chunks = [
+            resource_ids[i : i + max_ids] for i in range(0, len(resource_ids), max_ids)
+        ]
+        resources = []
+        with ThreadPoolExecutor(self.MAX_PAGE_WORKERS) as executor:
+            for response_dict in executor.map(
+                lambda resource_ids_chunk: self._get_amp_api_json(
+                    f"{self.AMP_API_URL}/v1/catalog/{self.storefront}/{resource_type}",
+                    params={
+                        "ids": ",".join(resource_ids_chunk),
+                        **params,
+                    },
+                    allow_empty=True,
+                ),
+                resource_ids_chunks,
+            ):
+                if response_dict is not None:
+                    resources.extend(response_dict["data"])
+        return resources
+
+    def get_songs(
+        self,
+        song_ids: list[str],
+        extend: str = "extendedAssetUrls",
+        include: str = "lyrics,albums",
+        fields: dict[str, str] = None,
+    ) -> list[dict]:
+        return self._get_resources(
+            "songs",
+            song_ids,
+            {
+                "include": include,
+                "extend": extend,
+                **self._get_fields_params(fields),
+            },
+        )
+
+    def get_albums(
+        self,
+        album_ids: list[str],
+        extend: str = "extendedAssetUrls",
+        fields: dict[str, str] = None,
+    ) -> list[dict]:
+        return self._get_resources(
+            "albums",
+            album_ids,
+            {
+                "extend": extend,
+                **self._get_fields_params(fields),
+            },
+        )
+
+    def get_music_videos(
+        self,
+        music_video_ids: list[str],
+        include: str = "albums",
+    ) -> list[dict]:
+        return self._get_resources(
+            "music-videos",
+            music_video_ids,
+            {
+                "include": include,
+            },
+        )
 
     def get_playlist(
         self,
@@ -235,28 +612,125 @@ class AppleMusicApi:
         limit_tracks: int = 300,
         extend: str = "extendedAssetUrls",
         fetch_all: bool = True,
+        fields: dict[str, str] = None,
     ) -> dict | None:
-        response = self.session.get(
+        response_dict = self._get_amp_api_json(
             f"{self.AMP_API_URL}/v1/catalog/{self.storefront}/playlists/{playlist_id}",
             params={
                 "extend": extend,
                 "limit[tracks]": limit_tracks,
+                **self._get_fields_params(fields),
             },
         )
-        if response.status_code == 404:
+        if response_dict is None:
             return None
-        self._check_amp_api_response(response)
 
-        playlist = response.json()["data"][0]
+        playlist = response_dict["data"][0]
         if fetch_all:
             for additional_data in self._extend_api_data(
                 playlist["relationships"]["tracks"],
                 limit_tracks,
                 extend,
+                fields,
             ):
                 playlist["relationships"]["tracks"]["data"].extend(additional_data)
         return playlist
 
+    def _get_available_ids(
+        self,
+        storefront: str,
+        resource_type: str,
+        resource_ids: list[str],
+    ) -> set[str]:
+        response = self._request(
+            "GET",
+            f"{self.AMP_API_URL}/v1/catalog/{storefront}/{resource_type}",
+            params={
+                "ids": ",".join(resource_ids),
+                f"fields[{resource_type}]": "playParams",
+            },
+        )
+        if response.status_code == 404:
+            return set()
+        try:
+            response.raise_for_status()
+            response_dict = parse_json(response.content)
+        except (
+            requests.HTTPError,
+            ValueError,
+        ):
+            raise_response_exception(response)
+        return {
+            resource["id"]
+            for resource in response_dict.get("data", [])
+            if resource.get("attributes", {}).get("playParams")
+        }
+
+    def get_availability(
+        self,
+        resource_ids: list[str],
+        storefronts: list[str],
+        resource_type: str = "songs",
+    ) -> dict[str, dict[str, bool]]:
+        availability = {resource_id: {} for resource_id in resource_ids}
+        missing_resource_ids = {storefront: [] for storefront in storefronts}
+        cache_keys = {}
+        cache_entries = {}
+        if self.metadata_cache is not None:
+            cache_keys = {
+                (storefront, resource_id): self.metadata_cache.get_key(
+                    storefront,
+                    "availability",
+                    resource_type,
+                    resource_id,
+                )
+                for storefront in storefronts
+                for resource_id in availability
+            }
+            cache_entries = self.metadata_cache.get_many(list(cache_keys.values()))
+        for storefront in storefronts:
+            for resource_id in availability:
+                cache_entry = cache_entries.get(
+                    cache_keys.get((storefront, resource_id))
+                )
+                if cache_entry is not None and not cache_entry.is_expired():
+                    availability[resource_id][storefront] = cache_entry.data
+                    continue
+                missing_resource_ids[storefront].append(resource_id)
+
+        max_ids = self.MAX_IDS_PER_REQUEST.get(resource_type, 100)
+        chunks = [
+            (storefront, storefront_resource_ids[i : i + max_ids])
+            for storefront, storefront_resource_ids in missing_resource_ids.items()
+            for i in range(0, len(storefront_resource_ids), max_ids)
+        ]
+        with ThreadPoolExecutor(self.MAX_PAGE_WORKERS) as executor:
+            for (storefront, resource_ids_chunk), available_ids in zip(
+                chunks,
+                executor.map(
+                    lambda chunk: self._get_available_ids(
+                        chunk[0],
+                        resource_type,
+                        chunk[1],
+                    ),
+                    chunks,
+                ),
+            ):
+                for resource_id in resource_ids_chunk:
+                    availability[resource_id][storefront] = resource_id in available_ids
+                if self.metadata_cache is not None:
+                    self.metadata_cache.set_many(
+                        [
+                            (
+                                cache_keys[(storefront, resource_id)],
+                                availability[resource_id][storefront],
+                            )
+                            for resource_id in resource_ids_chunk
+                        ],
+                        "availability",
+                    )
+        return availability
+
     def search(
         self,
         term: str,
@@ -264,7 +738,7 @@ class AppleMusicApi:
         limit: int = 25,
         offset: int = 0,
     ) -> dict | None:
-        response = self.session.get(
+        response_dict = self._get_amp_api_json(
             f"{self.AMP_API_URL}/v1/catalog/{self.storefront}/search",
             params={
                 "term": term,
@@ -273,18 +747,18 @@ class AppleMusicApi:
                 "offset": offset,
             },
         )
-        if response.status_code == 404:
+        if response_dict is None:
             return None
-        self._check_amp_api_response(response)
 
-        return response.json()["results"]
+        return response_dict["results"]
 
     def get_library_album(
         self,
         album_id: str,
         extend: str = "extendedAssetUrls",
     ) -> dict | None:
-        response = self.session.get(
+        response = self._request(
+            "GET",
             f"{self.AMP_API_URL}/v1/me/library/albums/{album_id}",
             params={
                 "extend": extend,
@@ -292,9 +766,9 @@ class AppleMusicApi:
         )
         if response.status_code == 404:
             return None
-        self._check_amp_api_response(response)
+        response_dict = self._check_amp_api_response(response)
 
-        return response.json()["data"][0]
+        return response_dict["data"][0]
 
     def get_library_playlist(
         self,
@@ -304,7 +778,8 @@ class AppleMusicApi:
         extend: str = "extendedAssetUrls",
         fetch_all: bool = True,
     ) -> dict | None:
-        response = self.session.get(
+        response = self._request(
+            "GET",
             f"{self.AMP_API_URL}/v1/me/library/playlists/{playlist_id}",
             params={
                 "include": include,
@@ -314,9 +789,9 @@ class AppleMusicApi:
         )
         if response.status_code == 404:
             return None
-        self._check_amp_api_response(response)
+        response_dict = self._check_amp_api_response(response)
 
-        playlist = response.json()["data"][0]
+        playlist = response_dict["data"][0]
         if fetch_all:
             for additional_data in self._extend_api_data(
                 playlist["relationships"]["tracks"],
@@ -326,41 +801,105 @@ class AppleMusicApi:
                 playlist["relationships"]["tracks"]["data"].extend(additional_data)
         return playlist
 
+    def iter_remaining_pages(
+        self,
+        api_response: dict,
+        limit: int,
+        extend: str,
+        fields: dict[str, str] = None,
+    ) -> typing.Generator[list[dict], None, None]:
+        yield from self._extend_api_data(api_response, limit, extend, fields)
+
     def _extend_api_data(
         self,
         api_response: dict,
         limit: int,
         extend: str,
+        fields: dict[str, str] = None,
     ) -> typing.Generator[list[dict], None, None]:
         next_uri = api_response.get("next")
+        total = api_response.get("meta", {}).get("total")
+        if next_uri and total is not None:
+            next_uri_parts = urlparse(next_uri)
+            offset = int(
+                parse_qs(next_uri_parts.query).get(
+                    "offset",
+                    [len(api_response["data"])],
+                )[0]
+            )
+            page_size = len(api_response["data"]) or limit
+            page_offsets = iter(range(offset, total, page_size))
+            get_page = lambda page_offset: self._get_next_uri_response(
+                next_uri_parts.path,
+                limit,
+                extend,
+                page_offset,
+                fields,
+            )
+            with ThreadPoolExecutor(self.MAX_PAGE_WORKERS) as executor:
+                pending_pages = deque(
+                    (page_offset, executor.submit(get_page, page_offset))
+                    for page_offset in itertools.islice(
+                        page_offsets,
+                        self.MAX_PAGE_WORKERS,
+                    )
+                )
+                while pending_pages:
+                    page_offset, page_future = pending_pages.popleft()
+                    page = page_future.result()
+                    next_uri = page.get("next")
+                    if (
+                        len(page["data"]) < page_size
+                        and page_offset + len(page["data"]) < total
+                    ):
+                        for _, pending_page_future in pending_pages:
+                            pending_page_future.cancel()
+                        yield page["data"]
+                        break
+                    page_offset = next(page_offsets, None)
+                    if page_offset is not None:
+                        pending_pages.append(
+                            (page_offset, executor.submit(get_page, page_offset))
+                        )
+                    yield page["data"]
         while next_uri:
-            playlist_next = self._get_next_uri_response(next_uri, limit, extend)
-            yield playlist_next["data"]
-            next_uri = playlist_next.get("next")
-            time.sleep(self.WAIT_TIME)
+            page = self._get_next_uri_response(
+                next_uri,
+                limit,
+                extend,
+                fields=fields,
+            )
+            yield page["data"]
+            next_uri = page.get("next")
 
     def _get_next_uri_response(
         self,
         next_uri: str,
         limit: int,
         extend: str,
+        offset: int = None,
+        fields: dict[str, str] = None,
     ) -> dict:
-        response = self.session.get(
+        response_dict = self._get_amp_api_json(
             self.AMP_API_URL + next_uri,
             params={
                 "limit": limit,
                 "extend": extend,
+                **({"offset": offset} if offset is not None else {}),
+                **self._get_fields_params(fields),
             },
         )
-        self._check_amp_api_response(response)
+        if response_dict is None:
+            return {"data": []}
 
-        return response.json()
+        return response_dict
 
     def get_webplayback(
         self,
         track_id: str,
     ) -> dict:
-        response = self.session.post(
+        response = self._request(
+            "POST",
             self.WEBPLAYBACK_API_URL,
             json={
                 "salableAdamId": track_id,
@@ -370,12 +909,12 @@ class AppleMusicApi:
 
         try:
             response.raise_for_status()
-            response_dict = response.json()
+            response_dict = parse_json(response.content)
             webplayback = response_dict.get("songList")
             assert webplayback
         except (
             requests.HTTPError,
-            requests.exceptions.JSONDecodeError,
+            ValueError,
             AssertionError,
         ):
             raise_response_exception(response)
@@ -388,7 +927,8 @@ class AppleMusicApi:
         track_uri: str,
         challenge: str,
     ) -> str:
-        response = self.session.post(
+        response = self._request(
+            "POST",
             self.LICENSE_API_URL,
             json={
                 "challenge": challenge,
@@ -402,12 +942,12 @@ class AppleMusicApi:
 
         try:
             response.raise_for_status()
-            response_dict = response.json()
+            response_dict = parse_json(response.content)
             widevine_license = response_dict.get("license")
             assert widevine_license
         except (
             requests.HTTPError,
-            requests.exceptions.JSONDecodeError,
+            ValueError,
             AssertionError,
         ):
             raise_response_exception(response)
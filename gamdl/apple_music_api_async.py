@@ -0,0 +1,394 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+import time
+from urllib.parse import parse_qs, urlparse
+
+from .apple_music_api import AppleMusicApi
+from .enums import ApiEndpoint
+from .retry import call_endpoint_async
+from .token_store import TokenStore
+from .transport import Transport, get_transport
+from .utils import parse_json, raise_response_exception
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+logger = logging.getLogger("gamdl")
+
+
+class AsyncAppleMusicApi:
+    APPLE_MUSIC_HOMEPAGE_URL = AppleMusicApi.APPLE_MUSIC_HOMEPAGE_URL
+    AMP_API_URL = AppleMusicApi.AMP_API_URL
+    WEBPLAYBACK_API_URL = AppleMusicApi.WEBPLAYBACK_API_URL
+    LICENSE_API_URL = AppleMusicApi.LICENSE_API_URL
+    MAX_PAGE_WORKERS = AppleMusicApi.MAX_PAGE_WORKERS
+    DEVELOPER_TOKEN_REFRESH_INTERVAL = AppleMusicApi.DEVELOPER_TOKEN_REFRESH_INTERVAL
+
+    def __init__(
+        self,
+        storefront: str,
+        developer_token: str,
+        media_user_token: str | None = None,
+        language: str = "en-US",
+        max_connections: int = Transport.ASYNC_MAX_CONNECTIONS,
+    ):
+        self.storefront = storefront
+        self.developer_token = developer_token
+        self.media_user_token = media_user_token
+        self.language = language
+        self.max_connections = max_connections
+        self._set_client()
+
+    @classmethod
+    def from_apple_music_api(
+        cls,
+        apple_music_api: AppleMusicApi,
+        max_connections: int = Transport.ASYNC_MAX_CONNECTIONS,
+    ) -> AsyncAppleMusicApi:
+        return cls(
+            storefront=apple_music_api.storefront,
+            developer_token=apple_music_api.session.headers["authorization"].split(
+                " ", 1
+            )[1],
+            media_user_token=apple_music_api.media_user_token,
+            language=apple_music_api.language,
+            max_connections=max_connections,
+        )
+
+    def _set_client(self):
+        self.client = get_transport().create_async_client(self.max_connections)
+        self.client.headers.update(AppleMusicApi.SESSION_HEADERS)
+        self.client.headers["authorization"] = f"Bearer {self.developer_token}"
+        self.client.params = {"l": self.language}
+        if self.media_user_token:
+            self.client.cookies.set(
+                "media-user-token",
+                self.media_user_token,
+            )
+        self._token_lock = asyncio.Lock()
+        self._developer_token_refreshed_at = None
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def __aenter__(self) -> AsyncAppleMusicApi:
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
+
+    async def _refresh_developer_token(self):
+        home_page = (await self.client.get(self.APPLE_MUSIC_HOMEPAGE_URL)).text
+        index_js_uri = re.search(
+            r"/(assets/index-legacy[~-][^/\"]+\.js)",
+            home_page,
+        ).group(1)
+        index_js_page = (
+            await self.client.get(f"{self.APPLE_MUSIC_HOMEPAGE_URL}/{index_js_uri}")
+        ).text
+        self.developer_token = re.search('(?=eyJh)(.*?)(?=")', index_js_page).group(1)
+        self.client.headers["authorization"] = f"Bearer {self.developer_token}"
+
+    async def _send_request(
+        self,
+        method: str,
+        url: str,
+        **kwargs,
+    ) -> httpx.Response:
+        authorization = self.client.headers.get("authorization")
+        response = await self.client.request(method, url, **kwargs)
+
+        if response.status_code == 401:
+            async with self._token_lock:
+                if (
+                    self.client.headers.get("authorization") == authorization
+                    and self._should_refresh_developer_token()
+                ):
+                    logger.debug("Developer token was rejected, refreshing it")
+                    await self._refresh_developer_token()
+                    self._developer_token_refreshed_at = time.monotonic()
+            if self.client.headers.get("authorization") != authorization:
+                response = await self.client.request(method, url, **kwargs)
+
+        return response
+
+    def _should_refresh_developer_token(self) -> bool:
+        expires_at = TokenStore.get_token_expiry(self.developer_token)
+        if (
+            expires_at is not None
+            and expires_at - TokenStore.EXPIRY_MARGIN <= time.time()
+        ):
+            return True
+        return (
+            self._developer_token_refreshed_at is None
+            or time.monotonic() - self._developer_token_refreshed_at
+            >= self.DEVELOPER_TOKEN_REFRESH_INTERVAL
+        )
+
+    def _get_endpoint(self, url: str) -> ApiEndpoint:
+        if url.startswith(self.WEBPLAYBACK_API_URL):
+            return ApiEndpoint.WEBPLAYBACK
+        if url.startswith(self.LICENSE_API_URL):
+            return ApiEndpoint.LICENSE
+        return ApiEndpoint.AMP_API
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        **kwargs,
+    ) -> httpx.Response:
+        endpoint = self._get_endpoint(url)
+        kwargs.setdefault("timeout", get_transport().get_async_timeout(endpoint))
+        return await call_endpoint_async(
+            endpoint,
+            lambda: self._send_request(method, url, **kwargs),
+        )
+
+    def _check_amp_api_response(self, response: httpx.Response) -> dict:
+        try:
+            response.raise_for_status()
+            response_dict = parse_json(response.content)
+            assert response_dict.get("data") or response_dict.get("results") is not None
+        except (
+            httpx.HTTPStatusError,
+            ValueError,
+            AssertionError,
+        ):
+            raise_response_exception(response)
+        return response_dict
+
+    async def _get_amp_api_json(
+        self,
+        url: str,
+        params: dict = None,
+    ) -> dict | None:
+        response = await self._request("GET", url, params=params)
+        if response.status_code == 404:
+            return None
+        return self._check_amp_api_response(response)
+
+    async def get_song(
+        self,
+        song_id: str,
+        extend: str = "extendedAssetUrls",
+        include: str = "lyrics,albums",
+    ) -> dict | None:
+        response_dict = await self._get_amp_api_json(
+            f"{self.AMP_API_URL}/v1/catalog/{self.storefront}/songs/{song_id}",
+            params={
+                "include": include,
+                "extend": extend,
+            },
+        )
+        if response_dict is None:
+            return None
+
+        return response_dict["data"][0]
+
+    async def get_music_video(
+        self,
+        music_video_id: str,
+        include: str = "albums",
+    ) -> dict | None:
+        response_dict = await self._get_amp_api_json(
+            f"{self.AMP_API_URL}/v1/catalog/{self.storefront}/music-videos/{music_video_id}",
+            params={
+                "include": include,
+            },
+        )
+        if response_dict is None:
+            return None
+
+        return response_dict["data"][0]
+
+    async def get_album(
+        self,
+        album_id: str,
+        extend: str = "extendedAssetUrls",
+        fields: dict[str, str] = None,
+    ) -> dict | None:
+        response_dict = await self._get_amp_api_json(
+            f"{self.AMP_API_URL}/v1/catalog/{self.storefront}/albums/{album_id}",
+            params={
+                "extend": extend,
+                **AppleMusicApi._get_fields_params(fields),
+            },
+        )
+        if response_dict is None:
+            return None
+
+        return response_dict["data"][0]
+
+    async def get_playlist(
+        self,
+        playlist_id: str,
+        limit_tracks: int = 300,
+        extend: str = "extendedAssetUrls",
+        fetch_all: bool = True,
+        fields: dict[str, str] = None,
+    ) -> dict | None:
+        response_dict = await self._get_amp_api_json(
+            f"{self.AMP_API_URL}/v1/catalog/{self.storefront}/playlists/{playlist_id}",
+            params={
+                "extend": extend,
+                "limit[tracks]": limit_tracks,
+                **AppleMusicApi._get_fields_params(fields),
+            },
+        )
+        if response_dict is None:
+            return None
+
+        playlist = response_dict["data"][0]
+        if fetch_all:
+            playlist["relationships"]["tracks"]["data"].extend(
+                await self._extend_api_data(
+                    playlist["relationships"]["tracks"],
+                    limit_tracks,
+                    extend,
+                    fields,
+                )
+            )
+        return playlist
+
+    async def _extend_api_data(
+        self,
+        api_response: dict,
+        limit: int,
+        extend: str,
+        fields: dict[str, str] = None,
+    ) -> list[dict]:
+        additional_data = []
+        next_uri = api_response.get("next")
+        total = api_response.get("meta", {}).get("total")
+        if next_uri and total is not None:
+            next_uri_parts = urlparse(next_uri)
+            offset = int(
+                parse_qs(next_uri_parts.query).get(
+                    "offset",
+                    [len(api_response["data"])],
+                )[0]
+            )
+            page_size = len(api_response["data"]) or limit
+            page_offsets = range(offset, total, page_size)
+            semaphore = asyncio.Semaphore(self.MAX_PAGE_WORKERS)
+
+            async def get_page(page_offset: int) -> dict:
+                async with semaphore:
+                    return await self._get_next_uri_response(
+                        next_uri_parts.path,
+                        limit,
+                        extend,
+                        page_offset,
+                        fields,
+                    )
+
+            pages = await asyncio.gather(
+                *(get_page(page_offset) for page_offset in page_offsets)
+            )
+            next_uri = None
+            for page_offset, page in zip(page_offsets, pages):
+                additional_data.extend(page["data"])
+                next_uri = page.get("next")
+                if (
+                    len(page["data"]) < page_size
+                    and page_offset + len(page["data"]) < total
+                ):
+                    break
+        while next_uri:
+            page = await self._get_next_uri_response(
+                next_uri,
+                limit,
+                extend,
+                fields=fields,
+            )
+            additional_data.extend(page["data"])
+            next_uri = page.get("next")
+        return additional_data
+
+    async def _get_next_uri_response(
+        self,
+        next_uri: str,
+        limit: int,
+        extend: str,
+        offset: int = None,
+        fields: dict[str, str] = None,
+    ) -> dict:
+        response_dict = await self._get_amp_api_json(
+            self.AMP_API_URL + next_uri,
+            params={
+                "limit": limit,
+                "extend": extend,
+                **({"offset": offset} if offset is not None else {}),
+                **AppleMusicApi._get_fields_params(fields),
+            },
+        )
+        if response_dict is None:
+            return {"data": []}
+
+        return response_dict
+
+    async def get_webplayback(
+        self,
+        track_id: str,
+    ) -> dict:
+        response = await self._request(
+            "POST",
+            self.WEBPLAYBACK_API_URL,
+            json={
+                "salableAdamId": track_id,
+                "language": self.language,
+            },
+        )
+
+        try:
+            response.raise_for_status()
+            response_dict = parse_json(response.content)
+            webplayback = response_dict.get("songList")
+            assert webplayback
+        except (
+            httpx.HTTPStatusError,
+            ValueError,
+            AssertionError,
+        ):
+            raise_response_exception(response)
+
+        return webplayback[0]
+
+    async def get_widevine_license(
+        self,
+        track_id: str,
+        track_uri: str,
+        challenge: str,
+    ) -> str:
+        response = await self._request(
+            "POST",
+            self.LICENSE_API_URL,
+            json={
+                "challenge": challenge,
+                "key-system": "com.widevine.alpha",
+                "uri": track_uri,
+                "adamId": track_id,
+                "isLibrary": False,
+                "user-initiated": True,
+            },
+        )
+
+        try:
+            response.raise_for_status()
+            response_dict = parse_json(response.content)
+            widevine_license = response_dict.get("license")
+            assert widevine_license
+        except (
+            httpx.HTTPStatusError,
+            ValueError,
+            AssertionError,
+        ):
+            raise_response_exception(response)
+
+        return widevine_license
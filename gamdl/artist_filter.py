@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import re
+
+
+class ArtistFilter:
+    MEDIA_TYPES = ("albums", "music-videos")
+    ALBUM_TYPES = ("album", "single", "ep", "compilation")
+    CONTENT_RATINGS = ("explicit", "clean", "none")
+    DATE_RE = r"^[0-9]{4}(?:-[0-9]{2}(?:-[0-9]{2})?)?$"
+
+    def __init__(
+        self,
+        media_type: str = "albums",
+        album_types: set[str] = None,
+        content_ratings: set[str] = None,
+        released_from: str = None,
+        released_to: str = None,
+        min_track_count: int = None,
+    ):
+        self.media_type = media_type
+        self.album_types = album_types
+        self.content_ratings = content_ratings
+        self.released_from = released_from
+        self.released_to = released_to
+        self.min_track_count = min_track_count
+
+    @classmethod
+    def parse(cls, expression: str) -> ArtistFilter:
+        artist_filter = cls()
+        for term in expression.split(";"):
+            term = term.strip()
+            if not term or term == "all":
+                continue
+            if "=" not in term:
+                raise ValueError(f'Invalid artist filter term "{term}"')
+
+            key, value = (part.strip() for part in term.split("=", 1))
+            values = {v.strip().lower() for v in value.split(",") if v.strip()}
+            if key == "media":
+                if value not in cls.MEDIA_TYPES:
+                    raise ValueError(f'Invalid artist filter media type "{value}"')
+                artist_filter.media_type = value
+            elif key == "type":
+                if not values <= set(cls.ALBUM_TYPES):
+                    raise ValueError(f'Invalid artist filter album type "{value}"')
+                artist_filter.album_types = values
+            elif key == "rating":
+                if not values <= set(cls.CONTENT_RATINGS):
+                    raise ValueError(f'Invalid artist filter rating "{value}"')
+                artist_filter.content_ratings = values
+            elif key in {"from", "to"}:
+                if not re.match(cls.DATE_RE, value):
+                    raise ValueError(f'Invalid artist filter date "{value}"')
+                if key == "from":
+                    artist_filter.released_from = value
+                else:
+                    artist_filter.released_to = value
+            elif key == "min-tracks":
+                artist_filter.min_track_count = int(value)
+            else:
+                raise ValueError(f'Unknown artist filter key "{key}"')
+        return artist_filter
+
+    @staticmethod
+    def get_album_type(album: dict) -> str:
+        attributes = album["attributes"]
+        if attributes.get("isCompilation"):
+            return "compilation"
+        if attributes.get("isSingle"):
+            return "single"
+        if attributes.get("name", "").endswith(" - EP"):
+            return "ep"
+        return "album"
+
+    def matches(self, media: dict) -> bool:
+        attributes = media["attributes"]
+        if (
+            self.album_types is not None
+            and media["type"] == "albums"
+            and self.get_album_type(media) not in self.album_types
+        ):
+            return False
+        if (
+            self.content_ratings is not None
+            and attributes.get("contentRating", "none") not in self.content_ratings
+        ):
+            return False
+
+        release_date = attributes.get("releaseDate")
+        if self.released_from is not None and (
+            release_date is None or release_date < self.released_from
+        ):
+            return False
+        if self.released_to is not None and (
+            release_date is None
+            or release_date[: len(self.released_to)] > self.released_to
+        ):
+            return False
+
+        if (
+            self.min_track_count is not None
+            and media["type"] == "albums"
+            and attributes.get("trackCount", 0) < self.min_track_count
+        ):
+            return False
+        return True
+
+    def filter(self, medias: list[dict]) -> list[dict]:
+        return [media for media in medias if self.matches(media)]
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import sqlite3
+import time
+from pathlib import Path
+
+
+class ArtistSnapshot:
+    INITIAL_QUERIES = (
+        """
+        CREATE TABLE IF NOT EXISTS artist_snapshots (
+            artist_id TEXT NOT NULL,
+            storefront TEXT NOT NULL,
+            media_type TEXT NOT NULL,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (artist_id, storefront, media_type)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS artist_snapshot_media (
+            artist_id TEXT NOT NULL,
+            storefront TEXT NOT NULL,
+            media_type TEXT NOT NULL,
+            media_id TEXT NOT NULL,
+            PRIMARY KEY (artist_id, storefront, media_type, media_id)
+        )
+        """,
+    )
+    GET_SNAPSHOT_QUERY = """
+        SELECT updated_at FROM artist_snapshots
+        WHERE artist_id = ? AND storefront = ? AND media_type = ?
+    """
+    GET_MEDIA_QUERY = """
+        SELECT media_id FROM artist_snapshot_media
+        WHERE artist_id = ? AND storefront = ? AND media_type = ?
+    """
+    DELETE_MEDIA_QUERY = """
+        DELETE FROM artist_snapshot_media
+        WHERE artist_id = ? AND storefront = ? AND media_type = ?
+    """
+    ADD_MEDIA_QUERY = """
+        INSERT OR IGNORE INTO artist_snapshot_media
+        (artist_id, storefront, media_type, media_id)
+        VALUES (?, ?, ?, ?)
+    """
+    ADD_SNAPSHOT_QUERY = """
+        INSERT OR REPLACE INTO artist_snapshots
+        (artist_id, storefront, media_type, updated_at)
+        VALUES (?, ?, ?, ?)
+    """
+
+    def __init__(self, file_path: Path):
+        self.file_path = file_path
+        self._initialize_db()
+
+    def _initialize_db(self):
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with sqlite3.connect(self.file_path) as conn:
+            for query in self.INITIAL_QUERIES:
+                conn.execute(query)
+            conn.commit()
+
+    def get(
+        self,
+        artist_id: str,
+        storefront: str,
+        media_type: str,
+    ) -> set[str] | None:
+        with sqlite3.connect(self.file_path) as conn:
+            key = (artist_id, storefront, media_type)
+            if conn.execute(self.GET_SNAPSHOT_QUERY, key).fetchone() is None:
+                return None
+            return {media_id for media_id, in conn.execute(self.GET_MEDIA_QUERY, key)}
+
+    def save(
+        self,
+        artist_id: str,
+        storefront: str,
+        media_type: str,
+        media_ids: list[str],
+    ):
+        with sqlite3.connect(self.file_path) as conn:
+            key = (artist_id, storefront, media_type)
+            conn.execute(self.DELETE_MEDIA_QUERY, key)
+            conn.executemany(
+                self.ADD_MEDIA_QUERY,
+                [(*key, media_id) for media_id in media_ids],
+            )
+            conn.execute(self.ADD_SNAPSHOT_QUERY, (*key, time.time()))
+            conn.commit()
@@ -30,7 +30,9 @@ from .enums import (
 )
 from .exceptions import *
 from .itunes_api import ItunesApi
-from .utils import color_text, prompt_path
+from .search_resolver import SearchResolver
+from .transport import Transport, set_transport
+from .utils import color_text, iterate_in_background, prompt_path
 
 apple_music_api_from_netscape_cookies_sig = inspect.signature(
     AppleMusicApi.from_netscape_cookies
@@ -126,6 +128,17 @@ def load_config_file(
     is_flag=True,
     help="Interpret URLs as paths to text files containing URLs separated by newlines",
 )
+@click.option(
+    "--resolve-search-txt",
+    is_flag=True,
+    help='Interpret URLs as paths to text files containing "artist - title" lines and resolve them through search.',
+)
+@click.option(
+    "--queue-lookahead",
+    type=int,
+    default=2,
+    help="Number of upcoming URLs to resolve in the background while downloading. Set to 0 to resolve them one at a time.",
+)
 @click.option(
     "--config-path",
     type=Path,
@@ -153,6 +166,14 @@ def load_config_file(
     ].default,
     help="Path to .txt cookies file.",
 )
+@click.option(
+    "--additional-cookies-paths",
+    type=Csv(Path),
+    default=apple_music_api_from_netscape_cookies_sig.parameters[
+        "additional_cookies_paths"
+    ].default,
+    help="Comma-separated paths to .txt cookies files of additional accounts to spread playback requests across.",
+)
 @click.option(
     "--language",
     "-l",
@@ -160,6 +181,32 @@ def load_config_file(
     default=apple_music_api_from_netscape_cookies_sig.parameters["language"].default,
     help="Metadata language as an ISO-2A language code (don't always work for videos).",
 )
+@click.option(
+    "--developer-token-path",
+    type=Path,
+    default=apple_music_api_from_netscape_cookies_sig.parameters[
+        "developer_token_path"
+    ].default,
+    help="Path to the cached Apple Music developer token.",
+)
+@click.option(
+    "--metadata-cache-path",
+    type=Path,
+    default=apple_music_api_from_netscape_cookies_sig.parameters[
+        "metadata_cache_path"
+    ].default,
+    help="Path to the metadata cache database file.",
+)
+@click.option(
+    "--hedge-requests",
+    is_flag=True,
+    help="Send a duplicate metadata request when the first one is slower than usual.",
+)
+@click.option(
+    "--http2",
+    is_flag=True,
+    help="Use HTTP/2 for Apple Music API and media hosts.",
+)
 # Downloader specific options
 @click.option(
     "--output-path",
@@ -325,6 +372,41 @@ def load_config_file(
     default=downloader_sig.parameters["database_path"].default,
     help="Path to the downloaded media database file.",
 )
+@click.option(
+    "--negative-cache-path",
+    type=Path,
+    default=downloader_sig.parameters["negative_cache_path"].default,
+    help="Path to the database of media found unavailable on previous runs.",
+)
+@click.option(
+    "--negative-cache-ttl",
+    type=int,
+    default=downloader_sig.parameters["negative_cache_ttl"].default,
+    help="Seconds before unavailable media are checked again.",
+)
+@click.option(
+    "--probe-storefronts",
+    type=Csv(str),
+    default=downloader_sig.parameters["probe_storefronts"].default,
+    help="Comma-separated storefronts to check the availability of queued media in.",
+)
+@click.option(
+    "--artist-filter",
+    type=str,
+    default=downloader_sig.parameters["artist_filter"].default,
+    help='Select artist items without prompting, e.g. "type=album,ep;from=2020;rating=explicit;min-tracks=4", "media=music-videos" or "all".',
+)
+@click.option(
+    "--artist-snapshot-path",
+    type=Path,
+    default=downloader_sig.parameters["artist_snapshot_path"].default,
+    help="Path to the database of artist releases seen on previous runs. Only new releases are queued for artists found in it.",
+)
+@click.option(
+    "--probe-only",
+    is_flag=True,
+    help="Only print the availability of queued media, don't download anything.",
+)
 # DownloaderSong specific options
 @click.option(
     "--codec-song",
@@ -376,11 +458,18 @@ def main(
     urls: list[str],
     disable_music_video_skip: bool,
     read_urls_as_txt: bool,
+    resolve_search_txt: bool,
+    queue_lookahead: int,
     config_path: Path,
     log_level: str,
     no_exceptions: bool,
     cookies_path: Path,
+    additional_cookies_paths: list[Path],
     language: str,
+    developer_token_path: Path,
+    metadata_cache_path: Path,
+    hedge_requests: bool,
+    http2: bool,
     output_path: Path,
     temp_path: Path,
     wvd_path: Path,
@@ -408,6 +497,12 @@ def main(
     cover_size: int,
     truncate: int,
     database_path: Path,
+    negative_cache_path: Path,
+    negative_cache_ttl: int,
+    probe_storefronts: list[str],
+    artist_filter: str,
+    artist_snapshot_path: Path,
+    probe_only: bool,
     codec_song: SongCodec,
     synced_lyrics_format: SyncedLyricsFormat,
     codec_music_video: list[MusicVideoCodec],
@@ -428,10 +523,21 @@ def main(
         wvd_path = prompt_path(True, wvd_path, ".wvd file")
 
     logger.info("Starting Gamdl")
+    if http2:
+        set_transport(Transport(http2=True))
     apple_music_api = AppleMusicApi.from_netscape_cookies(
         cookies_path,
         language,
+        developer_token_path,
+        metadata_cache_path,
+        hedge_requests,
+        additional_cookies_paths,
     )
+    if apple_music_api.account_pool is not None:
+        logger.info(
+            f"Spreading playback requests across "
+            f"{len(apple_music_api.account_pool.accounts)} account(s)"
+        )
     if not apple_music_api.account_info["meta"]["subscription"]["active"]:
         logger.critical(
             "No active Apple Music subscription found, you won't be able to download"
@@ -447,6 +553,8 @@ def main(
     itunes_api = ItunesApi(
         apple_music_api.storefront,
         apple_music_api.language,
+        metadata_cache_path,
+        hedge_requests,
     )
 
     downloader = Downloader(
@@ -480,6 +588,11 @@ def main(
         truncate,
         database_path,
         log_level in ("WARNING", "ERROR"),
+        negative_cache_path=negative_cache_path,
+        negative_cache_ttl=negative_cache_ttl,
+        probe_storefronts=probe_storefronts,
+        artist_filter=artist_filter,
+        artist_snapshot_path=artist_snapshot_path,
     )
 
     downloader_song = DownloaderSong(
@@ -556,53 +669,142 @@ def main(
 
     error_count = 0
 
-    for url_index, url in enumerate(urls, start=1):
-        url_progress = color_text(f"URL {url_index}/{len(urls)}", colorama.Style.DIM)
-        try:
-            logger.info(f'({url_progress}) Processing "{url}"')
-            url_info = downloader.parse_url_info(url)
-
-            if not url_info:
+    if resolve_search_txt:
+        search_lines = []
+        for url in urls:
+            if Path(url).exists():
+                search_lines.extend(Path(url).read_text(encoding="utf-8").splitlines())
+        logger.info(f"Resolving {len(search_lines)} line(s) through search")
+        search_resolver = SearchResolver(apple_music_api)
+        urls = []
+        for search_match in search_resolver.resolve_lines(search_lines):
+            if search_match.song is None:
                 error_count += 1
-                logger.error(f"({url_progress}) Invalid URL, skipping")
+                logger.error(f'No match found for "{search_match.query.line}"')
                 continue
+            logger.debug(
+                f'Matched "{search_match.query.line}" to '
+                f'"{search_match.song["attributes"]["artistName"]} - '
+                f'{search_match.song["attributes"]["name"]}" '
+                f"({search_match.score:.2f})"
+            )
+            urls.append(search_resolver.get_song_url(search_match.song))
+
+    def resolve_url(url: str) -> tuple:
+        url_info = downloader.parse_url_info(url)
+        if not url_info:
+            return url_info, None, None
+
+        availability_map = {}
+        prefetch_itunes_resources = (
+            not skip_mv
+            and not synced_lyrics_only
+            and (url_info.type != "album" or disable_music_video_skip)
+        )
 
-            download_queue = downloader.get_download_queue(url_info)
+        def on_queue_page(medias_metadata: list[dict]):
+            if probe_storefronts or probe_only:
+                availability_map.update(
+                    downloader.get_availability_map(medias_metadata)
+                )
+            if prefetch_itunes_resources:
+                downloader_music_video.prefetch_itunes_resources(medias_metadata)
 
-            if not download_queue:
-                error_count += 1
-                logger.error(f"({url_progress}) Media not found, skipping")
-                continue
+        download_queue = downloader.get_download_queue(
+            url_info,
+            page_callback=on_queue_page,
+        )
+        return url_info, download_queue, availability_map
+
+    def resolve_urls() -> typing.Generator[tuple, None, None]:
+        for url in urls:
+            try:
+                yield url, *resolve_url(url), None
+            except Exception as e:
+                yield url, None, None, None, e
+
+    resolved_urls = resolve_urls()
+    if queue_lookahead > 0:
+        resolved_urls = iterate_in_background(resolved_urls, queue_lookahead)
+
+    for url_index, (
+        url,
+        url_info,
+        download_queue,
+        availability_map,
+        exception,
+    ) in enumerate(resolved_urls, start=1):
+        url_progress = color_text(f"URL {url_index}/{len(urls)}", colorama.Style.DIM)
+        logger.info(f'({url_progress}) Processing "{url}"')
 
-            download_queue_medias_metadata = download_queue.medias_metadata
-        except Exception as e:
+        if exception is not None:
             error_count += 1
             logger.error(
                 f'({url_progress}) Failed to process URL "{url}", skipping',
-                exc_info=not no_exceptions,
+                exc_info=exception if not no_exceptions else False,
             )
             continue
-        for download_index, media_metadata in enumerate(
-            download_queue_medias_metadata,
-            start=1,
-        ):
+
+        if not url_info:
+            error_count += 1
+            logger.error(f"({url_progress}) Invalid URL, skipping")
+            continue
+
+        if not download_queue:
+            error_count += 1
+            logger.error(f"({url_progress}) Media not found, skipping")
+            continue
+
+        url_error_count = error_count
+        download_index = 0
+        while True:
+            try:
+                download_queue_item = next(download_queue.items, None)
+            except KeyboardInterrupt:
+                exit(0)
+            except Exception as e:
+                error_count += 1
+                logger.error(
+                    f'({url_progress}) Failed to load the rest of "{url}", skipping',
+                    exc_info=not no_exceptions,
+                )
+                break
+            if download_queue_item is None:
+                break
+            download_index += 1
             queue_progress = color_text(
-                f"Track {download_index}/{len(download_queue_medias_metadata)} from URL {url_index}/{len(urls)}",
+                f"Track {download_index}"
+                + (f"/{download_queue.total}" if download_queue.total else "")
+                + f" from URL {url_index}/{len(urls)}",
                 colorama.Style.DIM,
             )
-            try:
+            if probe_only:
+                media_metadata = downloader.get_queue_item_metadata(download_queue_item)
+                media_availability = availability_map.get(
+                    downloader.get_media_id_of_library_media(media_metadata),
+                    {},
+                )
+                available_storefronts = [
+                    storefront
+                    for storefront, is_available in media_availability.items()
+                    if is_available
+                ]
                 logger.info(
-                    f'({queue_progress}) "{media_metadata["attributes"]["name"]}"'
+                    f'({queue_progress}) "{download_queue_item.name}": '
+                    + (", ".join(available_storefronts) or "Not available")
                 )
+                continue
+            try:
+                logger.info(f'({queue_progress}) "{download_queue_item.name}"')
 
                 if (
                     (
                         synced_lyrics_only
-                        and media_metadata["type"] not in {"songs", "library-songs"}
+                        and download_queue_item.type not in {"songs", "library-songs"}
                     )
-                    or (media_metadata["type"] == "music-videos" and skip_mv)
+                    or (download_queue_item.type == "music-videos" and skip_mv)
                     or (
-                        media_metadata["type"] == "music-videos"
+                        download_queue_item.type == "music-videos"
                         and url_info.type == "album"
                         and not disable_music_video_skip
                     )
@@ -612,23 +814,48 @@ def main(
                     )
                     continue
 
-                if media_metadata["type"] in {"songs", "library-songs"}:
+                media_metadata = downloader.get_queue_item_metadata(download_queue_item)
+                media_availability = availability_map.get(
+                    downloader.get_media_id_of_library_media(media_metadata),
+                    {},
+                )
+                if not media_availability.get(apple_music_api.storefront, True):
+                    available_storefronts = [
+                        storefront
+                        for storefront, is_available in media_availability.items()
+                        if is_available
+                    ]
+                    logger.warning(
+                        f"({queue_progress}) Track is not available in your storefront"
+                        + (
+                            f" (available in {', '.join(available_storefronts)})"
+                            if available_storefronts
+                            else ""
+                        )
+                        + ", skipping"
+                    )
+                    continue
+
+                if download_queue_item.type in {"songs", "library-songs"}:
                     for _ in downloader_song.download(
                         media_metadata=media_metadata,
                         playlist_attributes=download_queue.playlist_attributes,
-                        playlist_track=download_index,
+                        playlist_track=download_queue_item.playlist_index,
                     ):
                         pass
 
-                if media_metadata["type"] in {"music-videos", "library-music-videos"}:
+                if download_queue_item.type in {
+                    "music-videos",
+                    "library-music-videos",
+                }:
                     for _ in downloader_music_video.download(
                         media_metadata=media_metadata,
                         playlist_attributes=download_queue.playlist_attributes,
-                        playlist_track=download_index,
+                        playlist_track=download_queue_item.playlist_index,
                     ):
                         pass
 
-                if media_metadata["type"] == "uploaded-videos":
+                if download_queue_item.type == "uploaded-videos":
                     for _ in downloader_post.download(
                         media_metadata=media_metadata,
                     ):
@@ -646,8 +873,31 @@ def main(
             except Exception as e:
                 error_count += 1
                 logger.error(
-                    f'({queue_progress}) Failed to download "{media_metadata["attributes"]["name"]}"',
+                    f'({queue_progress}) Failed to download "{download_queue_item.name}"',
                     exc_info=not no_exceptions,
                 )
 
+        if (
+            download_queue.artist_snapshot_info is not None
+            and not probe_only
+            and error_count == url_error_count
+        ):
+            try:
+                downloader.save_artist_snapshot(download_queue.artist_snapshot_info)
+            except Exception as e:
+                error_count += 1
+                logger.error(
+                    f"({url_progress}) Failed to save artist snapshot",
+                    exc_info=not no_exceptions,
+                )
+
+    for memory_cache in (
+        apple_music_api.album_cache,
+        itunes_api.resource_cache,
+        itunes_api.itunes_page_cache,
+        downloader.queued_media_metadata_cache,
+        Downloader.COVER_BYTES_CACHE,
+    ):
+        logger.debug(f"{memory_cache.name} cache: {memory_cache.get_stats()}")
+
     logger.info(f"Done, {error_count} error(s) occurred")
@@ -161,6 +161,8 @@ EXCLUDED_CONFIG_FILE_PARAMS = (
     "urls",
     "config_path",
     "read_urls_as_txt",
+    "resolve_search_txt",
+    "probe_only",
     "no_config_file",
     "version",
     "help",
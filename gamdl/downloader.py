@@ -2,8 +2,8 @@ from __future__ import annotations
 
 import base64
 import datetime
-import functools
 import io
+import itertools
 import logging
 import re
 import shutil
@@ -14,7 +14,6 @@ import uuid
 from pathlib import Path
 
 import colorama
-import requests
 from InquirerPy import inquirer
 from InquirerPy.base.control import Choice
 from mutagen.mp4 import MP4, MP4Cover
@@ -23,19 +22,34 @@ from pywidevine import PSSH, Cdm, Device
 from yt_dlp import YoutubeDL
 
 from .apple_music_api import AppleMusicApi
+from .artist_filter import ArtistFilter
+from .artist_snapshot import ArtistSnapshot
 from .database import Database
-from .enums import CoverFormat, DownloadMode, MediaFileFormat, RemuxMode
+from .enums import (
+    ApiEndpoint,
+    CoverFormat,
+    DownloadMode,
+    MediaFileFormat,
+    NegativeCacheReason,
+    RemuxMode,
+)
 from .hardcoded_wvd import HARDCODED_WVD
 from .itunes_api import ItunesApi
+from .memory_cache import MemoryCache
 from .models import (
+    ArtistSnapshotInfo,
     DecryptionKey,
     DownloadInfo,
     DownloadQueue,
+    DownloadQueueItem,
     MediaTags,
     PlaylistTags,
     UrlInfo,
 )
-from .utils import color_text, raise_response_exception
+from .negative_cache import NegativeCache
+from .retry import call_endpoint
+from .transport import get_transport
+from .utils import color_text, iterate_in_background, raise_response_exception
 
 logger = logging.getLogger("gamdl")
 
@@ -60,6 +74,27 @@ class Downloader:
         "jpeg": ".jpg",
         "tiff": ".tif",
     }
+    QUEUE_FIELDS = {
+        "songs": "name,hasLyrics,playParams,artwork,url,extendedAssetUrls",
+        "music-videos": "name,playParams,artwork,url,durationInMillis,contentRating",
+    }
+    HYDRATION_FIELDS = {
+        "songs": "hasLyrics,extendedAssetUrls",
+        "lyrics": "ttml",
+    }
+    ARTIST_QUEUE_FIELDS = {
+        "albums": "name,trackCount,releaseDate,contentRating,isSingle,isCompilation,playParams",
+        "music-videos": "name,playParams,artwork,url,durationInMillis,contentRating,releaseDate",
+    }
+    COVER_BYTES_CACHE = MemoryCache(
+        max_bytes=64 * 1024 * 1024,
+        get_size=len,
+        name="Cover",
+    )
+    WRITTEN_COVERS_CACHE_MAX_ENTRIES = 1024
+    QUEUED_MEDIA_METADATA_CACHE_MAX_ENTRIES = 1024
+    PLAYLIST_PAGE_LIMIT = 300
+    LIBRARY_PLAYLIST_PAGE_LIMIT = 100
 
     def __init__(
         self,
@@ -94,6 +129,11 @@ class Downloader:
         database_path: Path = None,
         silent: bool = False,
         skip_processing: bool = False,
+        negative_cache_path: Path = None,
+        negative_cache_ttl: int = 7 * 24 * 60 * 60,
+        probe_storefronts: list[str] = None,
+        artist_filter: str = None,
+        artist_snapshot_path: Path = None,
     ):
         self.apple_music_api = apple_music_api
         self.itunes_api = itunes_api
@@ -126,12 +166,23 @@ class Downloader:
         self.database_path = database_path
         self.silent = silent
         self.skip_processing = skip_processing
+        self.negative_cache_path = negative_cache_path
+        self.negative_cache_ttl = negative_cache_ttl
+        self.probe_storefronts = probe_storefronts
+        self.artist_filter = artist_filter
+        self.artist_snapshot_path = artist_snapshot_path
         self._set_temp_path()
         self._set_exclude_tags()
         self._set_binaries_path_full()
         self._set_truncate()
         self._set_database()
+        self._set_negative_cache()
         self._set_subprocess_additional_args()
+        self._set_written_covers_cache()
+        self._set_queued_media_metadata_cache()
+        self._set_resolved_media()
+        self._set_artist_filter()
+        self._set_artist_snapshot()
 
     def _set_temp_path(self):
         random_suffix = uuid.uuid4().hex[:8]
@@ -156,6 +207,15 @@ class Downloader:
         else:
             self.database = None
 
+    def _set_negative_cache(self):
+        if self.negative_cache_path is not None:
+            self.negative_cache = NegativeCache(
+                self.negative_cache_path,
+                self.negative_cache_ttl,
+            )
+        else:
+            self.negative_cache = None
+
     def _set_subprocess_additional_args(self):
         if self.silent:
             self.subprocess_additional_args = {
@@ -165,6 +225,31 @@ class Downloader:
         else:
             self.subprocess_additional_args = {}
 
+    def _set_written_covers_cache(self):
+        self.written_covers_cache = MemoryCache(
+            max_entries=self.WRITTEN_COVERS_CACHE_MAX_ENTRIES,
+            name="Written cover",
+        )
+
+    def _set_queued_media_metadata_cache(self):
+        self.queued_media_metadata_cache = MemoryCache(
+            max_entries=self.QUEUED_MEDIA_METADATA_CACHE_MAX_ENTRIES,
+            name="Queued media metadata",
+        )
+
+    def _set_resolved_media(self):
+        self.resolved_media = {}
+
+    def _set_artist_filter(self):
+        if self.artist_filter is not None:
+            self.artist_filter = ArtistFilter.parse(self.artist_filter)
+
+    def _set_artist_snapshot(self):
+        if self.artist_snapshot_path is not None:
+            self.artist_snapshot = ArtistSnapshot(self.artist_snapshot_path)
+        else:
+            self.artist_snapshot = None
+
     def set_cdm(self):
         if self.wvd_path:
             self.cdm = Cdm.from_device(Device.load(self.wvd_path))
@@ -185,11 +270,16 @@ class Downloader:
             **url_regex_result.groupdict(),
         )
 
-    def get_download_queue(self, url_info: UrlInfo) -> DownloadQueue:
+    def get_download_queue(
+        self,
+        url_info: UrlInfo,
+        page_callback: typing.Callable[[list[dict]], None] = None,
+    ) -> DownloadQueue | None:
         return self._get_download_queue(
             "song" if url_info.sub_id else url_info.type,
             url_info.sub_id or url_info.id or url_info.library_id,
             url_info.library_id is not None,
+            page_callback,
         )
 
     def _get_download_queue(
@@ -197,17 +287,26 @@ class Downloader:
         url_type: str,
         id: str,
         is_library: bool,
+        page_callback: typing.Callable[[list[dict]], None] = None,
     ) -> DownloadQueue | None:
         download_queue = DownloadQueue()
+        pages = None
 
         if url_type == "artist":
-            artist = self.apple_music_api.get_artist(id)
+            artist = self.apple_music_api.get_artist(
+                id,
+                fields=self.ARTIST_QUEUE_FIELDS,
+            )
 
             if artist is None:
                 return None
 
-            download_queue.medias_metadata = list(
-                self.get_download_queue_from_artist(artist)
+            download_queue.artist_snapshot_info = ArtistSnapshotInfo(
+                artist_id=artist["id"]
+            )
+            pages = self.get_download_queue_from_artist(
+                artist,
+                download_queue.artist_snapshot_info,
             )
 
         if url_type == "song":
@@ -216,34 +315,58 @@ class Downloader:
             if song is None:
                 return None
 
-            download_queue.medias_metadata = [song]
+            pages = [[song]]
 
         if url_type in {"album", "albums"}:
             if is_library:
                 album = self.apple_music_api.get_library_album(id)
             else:
-                album = self.apple_music_api.get_album(id)
+                album = self.apple_music_api.get_album(
+                    id,
+                    fields=self.QUEUE_FIELDS,
+                )
 
             if album is None:
                 return None
 
-            download_queue.medias_metadata = [
-                track for track in album["relationships"]["tracks"]["data"]
-            ]
+            tracks = album["relationships"]["tracks"]["data"]
+            download_queue.total = len(tracks)
+            pages = [tracks]
 
         if url_type == "playlist":
             if is_library:
-                playlist = self.apple_music_api.get_library_playlist(id)
+                limit = self.LIBRARY_PLAYLIST_PAGE_LIMIT
+                playlist = self.apple_music_api.get_library_playlist(
+                    id,
+                    limit=limit,
+                    fetch_all=False,
+                )
             else:
-                playlist = self.apple_music_api.get_playlist(id)
+                limit = self.PLAYLIST_PAGE_LIMIT
+                playlist = self.apple_music_api.get_playlist(
+                    id,
+                    limit_tracks=limit,
+                    fetch_all=False,
+                    fields=self.QUEUE_FIELDS,
+                )
 
             if playlist is None:
                 return None
 
-            download_queue.medias_metadata = [
-                track for track in playlist["relationships"]["tracks"]["data"]
-            ]
+            tracks = playlist["relationships"]["tracks"]
+            download_queue.total = tracks.get("meta", {}).get("total")
             download_queue.playlist_attributes = playlist["attributes"]
+            pages = itertools.chain(
+                [tracks["data"]],
+                iterate_in_background(
+                    self.apple_music_api.iter_remaining_pages(
+                        tracks,
+                        limit,
+                        "extendedAssetUrls",
+                        None if is_library else self.QUEUE_FIELDS,
+                    )
+                ),
+            )
 
         if url_type == "music-video":
             music_video = self.apple_music_api.get_music_video(id)
@@ -251,7 +374,7 @@ class Downloader:
             if music_video is None:
                 return None
 
-            download_queue.medias_metadata = [music_video]
+            pages = [[music_video]]
 
         if url_type == "post":
             post = self.apple_music_api.get_post(id)
@@ -259,39 +382,172 @@ class Downloader:
             if post is None:
                 return None
 
-            download_queue.medias_metadata = [post]
+            pages = [[post]]
 
+        if pages is None:
+            return None
+
+        download_queue.items = self._get_download_queue_items(pages, page_callback)
         return download_queue
 
+    def _get_download_queue_items(
+        self,
+        pages: typing.Iterable[list[dict]],
+        page_callback: typing.Callable[[list[dict]], None] = None,
+    ) -> typing.Generator[DownloadQueueItem, None, None]:
+        playlist_index = 0
+        for medias_metadata in pages:
+            self.hydrate_songs_metadata(medias_metadata)
+            if page_callback is not None:
+                try:
+                    page_callback(medias_metadata)
+                except Exception as e:
+                    logger.warning(f"Failed to process queue page: {e}")
+            for media_metadata in medias_metadata:
+                playlist_index += 1
+                self.queued_media_metadata_cache.set(
+                    (media_metadata["type"], media_metadata["id"]),
+                    media_metadata,
+                )
+                yield DownloadQueueItem(
+                    id=media_metadata["id"],
+                    type=media_metadata["type"],
+                    name=media_metadata["attributes"]["name"],
+                    playlist_index=playlist_index,
+                )
+
+    def get_queue_item_metadata(
+        self,
+        download_queue_item: DownloadQueueItem,
+    ) -> dict | None:
+        media_metadata = self.queued_media_metadata_cache.get(
+            (download_queue_item.type, download_queue_item.id)
+        )
+        if media_metadata is not None:
+            return media_metadata
+
+        if download_queue_item.type == "songs":
+            return self.apple_music_api.get_song(download_queue_item.id)
+        if download_queue_item.type == "music-videos":
+            return self.apple_music_api.get_music_video(download_queue_item.id)
+        if download_queue_item.type == "uploaded-videos":
+            return self.apple_music_api.get_post(download_queue_item.id)
+        return None
+
+    def get_new_artist_medias(
+        self,
+        artist_id: str,
+        media_type: str,
+        medias: list[dict],
+    ) -> list[dict]:
+        if self.artist_snapshot is None:
+            return medias
+
+        snapshot_media_ids = self.artist_snapshot.get(
+            artist_id,
+            self.apple_music_api.storefront,
+            media_type,
+        )
+        if snapshot_media_ids is None:
+            return medias
+        return [media for media in medias if media["id"] not in snapshot_media_ids]
+
+    def save_artist_snapshot(self, artist_snapshot_info: ArtistSnapshotInfo):
+        if self.artist_snapshot is None or artist_snapshot_info.media_type is None:
+            return
+
+        self.artist_snapshot.save(
+            artist_snapshot_info.artist_id,
+            self.apple_music_api.storefront,
+            artist_snapshot_info.media_type,
+            artist_snapshot_info.media_ids,
+        )
+
     def get_download_queue_from_artist(
         self,
         artist: dict,
-    ) -> typing.Generator[dict, None, None]:
-        media_type = inquirer.select(
-            message=f'Select which type to download for artist "{artist["attributes"]["name"]}":',
-            choices=[
-                Choice(name="Albums", value="albums"),
-                Choice(
-                    name="Music Videos",
-                    value="music-videos",
-                ),
-            ],
-            validate=lambda result: artist["relationships"].get(result, {}).get("data"),
-            invalid_message="The artist doesn't have any items of this type",
-        ).execute()
-        if media_type == "albums":
-            yield from self.select_albums_from_artist(
-                artist["relationships"]["albums"]["data"]
+        artist_snapshot_info: ArtistSnapshotInfo = None,
+    ) -> typing.Generator[list[dict], None, None]:
+        artist_medias = {
+            media_type: artist["relationships"].get(media_type, {}).get("data", [])
+            for media_type in ("albums", "music-videos")
+        }
+        new_artist_medias = {
+            media_type: self.get_new_artist_medias(artist["id"], media_type, medias)
+            for media_type, medias in artist_medias.items()
+        }
+
+        if self.artist_filter is not None:
+            media_type = self.artist_filter.media_type
+        else:
+            if not any(new_artist_medias.values()):
+                logger.info(
+                    f'No new releases for artist "{artist["attributes"]["name"]}" since the last snapshot'
+                )
+                return
+
+            media_type = inquirer.select(
+                message=f'Select which type to download for artist "{artist["attributes"]["name"]}":',
+                choices=[
+                    Choice(name="Albums", value="albums"),
+                    Choice(
+                        name="Music Videos",
+                        value="music-videos",
+                    ),
+                ],
+                validate=lambda result: new_artist_medias[result],
+                invalid_message="The artist doesn't have any new items of this type",
+            ).execute()
+
+        if artist_snapshot_info is not None:
+            artist_snapshot_info.media_type = media_type
+            artist_snapshot_info.media_ids = [
+                media["id"] for media in artist_medias[media_type]
+            ]
+
+        if self.artist_filter is not None:
+            medias = self.artist_filter.filter(new_artist_medias[media_type])
+            logger.debug(
+                f'Selected {len(medias)} {media_type} from artist "{artist["attributes"]["name"]}"'
             )
+            if media_type == "albums":
+                yield from self.get_albums_tracks(medias)
+            elif medias:
+                yield medias
+        elif media_type == "albums":
+            yield from self.select_albums_from_artist(new_artist_medias["albums"])
         elif media_type == "music-videos":
             yield from self.select_music_videos_from_artist(
-                artist["relationships"]["music-videos"]["data"]
+                new_artist_medias["music-videos"]
+            )
+
+    def get_albums_tracks(
+        self,
+        albums: list[dict],
+    ) -> typing.Generator[list[dict], None, None]:
+        if not albums:
+            return
+
+        albums_full = {
+            album["id"]: album
+            for album in self.apple_music_api.get_albums(
+                [album["id"] for album in albums],
+                fields=self.QUEUE_FIELDS,
             )
+        }
+        for album in albums:
+            album_full = albums_full.get(album["id"])
+            if album_full is None:
+                logger.warning(
+                    f'Album "{album["attributes"]["name"]}" was not found, skipping'
+                )
+                continue
+            yield album_full["relationships"]["tracks"]["data"]
 
     def select_albums_from_artist(
         self,
         albums: list[dict],
-    ) -> typing.Generator[dict, None, None]:
+    ) -> typing.Generator[list[dict], None, None]:
         choices = [
             Choice(
                 name=" | ".join(
@@ -311,16 +567,12 @@ class Downloader:
             choices=choices,
             multiselect=True,
         ).execute()
-        for album in selected:
-            for track in self.apple_music_api.get_album(album["id"])["relationships"][
-                "tracks"
-            ]["data"]:
-                yield track
+        yield from self.get_albums_tracks(selected)
 
     def select_music_videos_from_artist(
         self,
         music_videos: list[dict],
-    ) -> typing.Generator[dict, None, None]:
+    ) -> typing.Generator[list[dict], None, None]:
         choices = [
             Choice(
                 name=" | ".join(
@@ -341,8 +593,7 @@ class Downloader:
             choices=choices,
             multiselect=True,
         ).execute()
-        for music_video in selected:
-            yield music_video
+        yield selected
 
     def get_media_id_of_library_media(
         self,
@@ -351,6 +602,91 @@ class Downloader:
         play_params = library_media_metadata["attributes"].get("playParams", {})
         return play_params.get("catalogId", library_media_metadata["id"])
 
+    def has_catalog_id(self, media_metadata: dict) -> bool:
+        if not media_metadata["type"].startswith("library-"):
+            return True
+        play_params = media_metadata["attributes"].get("playParams", {})
+        return bool(play_params.get("catalogId"))
+
+    def get_availability_map(
+        self,
+        medias_metadata: list[dict],
+    ) -> dict[str, dict[str, bool]]:
+        storefronts = list(
+            dict.fromkeys(
+                [
+                    self.apple_music_api.storefront,
+                    *(self.probe_storefronts or []),
+                ]
+            )
+        )
+        availability_map = {}
+        for resource_type, media_types in (
+            ("songs", {"songs", "library-songs"}),
+            ("music-videos", {"music-videos", "library-music-videos"}),
+        ):
+            media_ids = [
+                self.get_media_id_of_library_media(media_metadata)
+                for media_metadata in medias_metadata
+                if media_metadata["type"] in media_types
+                and self.has_catalog_id(media_metadata)
+            ]
+            if media_ids:
+                availability_map.update(
+                    self.apple_music_api.get_availability(
+                        media_ids,
+                        storefronts,
+                        resource_type,
+                    )
+                )
+        return availability_map
+
+    def hydrate_songs_metadata(
+        self,
+        medias_metadata: list[dict],
+    ) -> None:
+        songs_metadata = [
+            media_metadata
+            for media_metadata in medias_metadata
+            if media_metadata["type"] in {"songs", "library-songs"}
+            and media_metadata.get("relationships") is None
+            and self.is_media_streamable(media_metadata)
+            and self.has_catalog_id(media_metadata)
+            and (
+                media_metadata["attributes"].get("hasLyrics")
+                or not media_metadata["attributes"].get("extendedAssetUrls")
+            )
+        ]
+        if not songs_metadata:
+            return
+
+        try:
+            songs = {
+                song["id"]: song
+                for song in self.apple_music_api.get_songs(
+                    [
+                        self.get_media_id_of_library_media(song_metadata)
+                        for song_metadata in songs_metadata
+                    ],
+                    include="lyrics",
+                    fields=self.HYDRATION_FIELDS,
+                )
+            }
+        except Exception as e:
+            logger.warning(
+                f"Failed to get metadata of {len(songs_metadata)} song(s): {e}"
+            )
+            return
+        for song_metadata in songs_metadata:
+            song = songs.get(self.get_media_id_of_library_media(song_metadata))
+            if song is None:
+                continue
+            song_metadata["relationships"] = song.get("relationships", {})
+            if not song_metadata["attributes"].get("extendedAssetUrls"):
+                song_metadata["attributes"]["extendedAssetUrls"] = song[
+                    "attributes"
+                ].get("extendedAssetUrls")
+
     def is_media_streamable(
         self,
         media_metadata: dict,
@@ -369,6 +705,45 @@ class Downloader:
         ):
             return final_path_database
 
+    def get_resolved_final_path(self, media_id: str) -> Path | None:
+        if self.overwrite:
+            return None
+
+        final_path = self.resolved_media.get(media_id)
+        if final_path is not None and final_path.exists():
+            return final_path
+        return None
+
+    def get_negative_cache_reason(
+        self,
+        media_id: str,
+        codec: str,
+    ) -> NegativeCacheReason | None:
+        if self.negative_cache is None:
+            return None
+
+        return self.negative_cache.get(
+            media_id,
+            codec,
+            self.apple_music_api.storefront,
+        )
+
+    def add_negative_cache_entry(
+        self,
+        media_id: str,
+        codec: str,
+        reason: NegativeCacheReason,
+    ):
+        if self.negative_cache is None:
+            return
+
+        self.negative_cache.add(
+            media_id,
+            codec,
+            self.apple_music_api.storefront,
+            reason,
+        )
+
     def get_playlist_tags(
         self,
         playlist_attributes: dict,
@@ -614,9 +989,21 @@ class Downloader:
         )
 
     @staticmethod
-    @functools.lru_cache()
     def get_cover_bytes(url: str) -> bytes | None:
-        response = requests.get(url)
+        return Downloader.COVER_BYTES_CACHE.get_or_set(
+            url,
+            lambda: Downloader._get_cover_bytes(url),
+        )
+
+    @staticmethod
+    def _get_cover_bytes(url: str) -> bytes | None:
+        response = call_endpoint(
+            ApiEndpoint.ARTWORK,
+            lambda: get_transport().session.get(
+                url,
+                timeout=get_transport().get_timeout(ApiEndpoint.ARTWORK),
+            ),
+        )
         if response.status_code == 200:
             return response.content
         elif response.status_code in (404, 400):
@@ -679,8 +1066,13 @@ class Downloader:
         final_path.parent.mkdir(parents=True, exist_ok=True)
         shutil.move(staged_path, final_path)
 
-    @functools.lru_cache()
     def write_cover(self, cover_path: Path, cover_url: str):
+        self.written_covers_cache.get_or_set(
+            (cover_path, cover_url),
+            lambda: self._write_cover(cover_path, cover_url),
+        )
+
+    def _write_cover(self, cover_path: Path, cover_url: str):
         cover_path.parent.mkdir(parents=True, exist_ok=True)
         cover_path.write_bytes(self.get_cover_bytes(cover_url))
 
@@ -802,6 +1194,13 @@ class Downloader:
                 download_info.lyrics.synced,
             )
 
+        if (
+            download_info.media_id
+            and download_info.final_path
+            and download_info.final_path.exists()
+        ):
+            self.resolved_media[download_info.media_id] = download_info.final_path
+
         if download_info.playlist_tags and self.save_playlist:
             playlist_file_path = self.get_playlist_file_path(
                 download_info.playlist_tags
@@ -15,6 +15,7 @@ from .enums import (
     MediaFileFormat,
     MusicVideoCodec,
     MusicVideoResolution,
+    NegativeCacheReason,
     RemuxFormatMusicVideo,
     RemuxMode,
 )
@@ -28,6 +29,7 @@ from .models import (
     StreamInfo,
     StreamInfoAv,
 )
+from .transport import get_transport
 from .utils import color_text
 
 logger = logging.getLogger("gamdl")
@@ -48,6 +50,9 @@ class DownloaderMusicVideo:
         self.remux_format = remux_format
         self.resolution = resolution
 
+    def get_negative_cache_codec(self) -> str:
+        return ",".join(codec.value for codec in self.codec)
+
     def get_stream_url_from_webplayback(self, webplayback: dict) -> str:
         return webplayback["hls-playlist-url"]
 
@@ -181,7 +186,7 @@ class DownloaderMusicVideo:
         stream_info.stream_url = playlist.uri
         stream_info.codec = playlist.stream_info.codecs
 
-        playlist_m3u8_obj = m3u8.load(stream_info.stream_url)
+        playlist_m3u8_obj = get_transport().load_m3u8(stream_info.stream_url)
         stream_info.widevine_pssh = self.get_pssh(playlist_m3u8_obj)
 
         return stream_info
@@ -199,7 +204,7 @@ class DownloaderMusicVideo:
         stream_info.stream_url = playlist["uri"]
         stream_info.codec = playlist["group_id"]
 
-        playlist_m3u8_obj = m3u8.load(stream_info.stream_url)
+        playlist_m3u8_obj = get_transport().load_m3u8(stream_info.stream_url)
         stream_info.widevine_pssh = self.get_pssh(playlist_m3u8_obj)
 
         return stream_info
@@ -208,7 +213,7 @@ class DownloaderMusicVideo:
         self,
         stream_url: str,
     ) -> StreamInfoAv | None:
-        playlist_master_m3u8_obj = m3u8.load(stream_url)
+        playlist_master_m3u8_obj = get_transport().load_m3u8(stream_url)
 
         stream_info_video = self.get_stream_info_video(playlist_master_m3u8_obj)
         stream_info_audio = self.get_stream_info_audio(playlist_master_m3u8_obj.data)
@@ -274,6 +279,20 @@ class DownloaderMusicVideo:
             return None
         return music_video_url.split("/")[-1].split("?")[0]
 
+    def prefetch_itunes_resources(self, medias_metadata: list[dict]) -> None:
+        try:
+            self.downloader.itunes_api.prefetch_resources(
+                [
+                    self.get_music_video_id_alt(media_metadata)
+                    or self.downloader.get_media_id_of_library_media(media_metadata)
+                    for media_metadata in medias_metadata
+                    if media_metadata["type"]
+                    in {"music-videos", "library-music-videos"}
+                ]
+            )
+        except Exception as e:
+            logger.debug(f"Failed to prefetch iTunes resources: {e}")
+
     def get_tags(
         self,
         id_alt: str,
@@ -478,18 +497,40 @@ class DownloaderMusicVideo:
         download_info.media_id = media_id
         colored_media_id = color_text(media_id, colorama.Style.DIM)
 
+        resolved_final_path = self.downloader.get_resolved_final_path(media_id)
+        if resolved_final_path:
+            download_info.final_path = resolved_final_path
+            yield download_info
+            raise MediaFileAlreadyExistsException(resolved_final_path)
+
         database_final_path = self.downloader.get_database_final_path(media_id)
         if database_final_path:
             download_info.final_path = database_final_path
             yield download_info
             raise MediaFileAlreadyExistsException(database_final_path)
 
+        negative_cache_reason = self.downloader.get_negative_cache_reason(
+            media_id,
+            self.get_negative_cache_codec(),
+        )
+        if negative_cache_reason == NegativeCacheReason.NOT_STREAMABLE:
+            yield download_info
+            raise MediaNotStreamableException()
+        if negative_cache_reason == NegativeCacheReason.FORMAT_NOT_AVAILABLE:
+            yield download_info
+            raise MediaFormatNotAvailableException()
+
         if not media_metadata:
             logger.debug(f"[{colored_media_id}] Getting Music Video metadata")
             media_metadata = self.downloader.apple_music_api.get_music_video(media_id)
         download_info.media_metadata = media_metadata
 
         if not self.downloader.is_media_streamable(media_metadata):
+            self.downloader.add_negative_cache_entry(
+                media_id,
+                "",
+                NegativeCacheReason.NOT_STREAMABLE,
+            )
             yield download_info
             raise MediaNotStreamableException()
 
@@ -520,6 +561,11 @@ class DownloaderMusicVideo:
             stream_info = self.get_stream_info_from_webplayback(webplayback)
 
         if not stream_info:
+            self.downloader.add_negative_cache_entry(
+                media_id,
+                self.get_negative_cache_codec(),
+                NegativeCacheReason.FORMAT_NOT_AVAILABLE,
+            )
             yield download_info
             raise MediaFormatNotAvailableException()
 
@@ -9,7 +9,7 @@ from InquirerPy import inquirer
 from InquirerPy.base.control import Choice
 
 from .downloader import Downloader
-from .enums import PostQuality
+from .enums import NegativeCacheReason, PostQuality
 from .exceptions import MediaFileAlreadyExistsException, MediaNotStreamableException
 from .models import DownloadInfo, MediaTags
 from .utils import color_text
@@ -111,18 +111,37 @@ class DownloaderPost:
         download_info.media_id = media_id
         colored_media_id = color_text(media_id, colorama.Style.DIM)
 
+        resolved_final_path = self.downloader.get_resolved_final_path(media_id)
+        if resolved_final_path:
+            download_info.final_path = resolved_final_path
+            yield download_info
+            raise MediaFileAlreadyExistsException(resolved_final_path)
+
         database_final_path = self.downloader.get_database_final_path(media_id)
         if database_final_path:
             download_info.final_path = database_final_path
             yield download_info
             raise MediaFileAlreadyExistsException(database_final_path)
 
+        negative_cache_reason = self.downloader.get_negative_cache_reason(
+            media_id,
+            "",
+        )
+        if negative_cache_reason == NegativeCacheReason.NOT_STREAMABLE:
+            yield download_info
+            raise MediaNotStreamableException()
+
         if not media_metadata:
             logger.debug(f"[{colored_media_id}] Getting Post Video metadata")
             media_metadata = self.downloader.apple_music_api.get_post(media_id)
         download_info.media_metadata = media_metadata
 
         if not self.downloader.is_media_streamable(media_metadata):
+            self.downloader.add_negative_cache_entry(
+                media_id,
+                "",
+                NegativeCacheReason.NOT_STREAMABLE,
+            )
             yield download_info
             raise MediaNotStreamableException()
 
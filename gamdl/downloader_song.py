@@ -19,7 +19,13 @@ from pywidevine import PSSH
 from pywidevine.license_protocol_pb2 import WidevinePsshData
 
 from .downloader import Downloader
-from .enums import MediaFileFormat, RemuxMode, SongCodec, SyncedLyricsFormat
+from .enums import (
+    MediaFileFormat,
+    NegativeCacheReason,
+    RemuxMode,
+    SongCodec,
+    SyncedLyricsFormat,
+)
 from .exceptions import *
 from .models import (
     DecryptionKey,
@@ -32,6 +38,7 @@ from .models import (
     StreamInfo,
     StreamInfoAv,
 )
+from .transport import get_transport
 from .utils import color_text
 
 logger = logging.getLogger("gamdl")
@@ -171,7 +178,7 @@ class DownloaderSong:
 
     def _get_stream_info(self, m3u8_url: str) -> StreamInfoAv | None:
         stream_info = StreamInfo()
-        m3u8_master_obj = m3u8.load(m3u8_url)
+        m3u8_master_obj = get_transport().load_m3u8(m3u8_url)
         m3u8_master_data = m3u8_master_obj.data
 
         if self.codec == SongCodec.ASK:
@@ -206,7 +213,7 @@ class DownloaderSong:
                 for drm_key in self.DRM_DEFAULT_KEY_MAPPING.keys()
             )
         else:
-            m3u8_obj = m3u8.load(stream_info.stream_url)
+            m3u8_obj = get_transport().load_m3u8(stream_info.stream_url)
             (
                 stream_info.widevine_pssh,
                 stream_info.playready_pssh,
@@ -238,7 +245,7 @@ class DownloaderSong:
             i for i in webplayback["assets"] if i["flavor"] == flavor
         )["URL"]
 
-        m3u8_obj = m3u8.load(stream_info.stream_url)
+        m3u8_obj = get_transport().load_m3u8(stream_info.stream_url)
         stream_info.widevine_pssh = m3u8_obj.keys[0].uri
 
         return StreamInfoAv(
@@ -634,18 +641,39 @@ class DownloaderSong:
         download_info.media_id = media_id
         colored_media_id = color_text(media_id, colorama.Style.DIM)
 
+        resolved_final_path = self.downloader.get_resolved_final_path(media_id)
+        if resolved_final_path:
+            download_info.final_path = resolved_final_path
+            yield download_info
+            raise MediaFileAlreadyExistsException(resolved_final_path)
+
         database_final_path = self.downloader.get_database_final_path(media_id)
         if database_final_path:
             download_info.final_path = database_final_path
             yield download_info
             raise MediaFileAlreadyExistsException(database_final_path)
 
+        negative_cache_reason = self.downloader.get_negative_cache_reason(
+            media_id,
+            self.codec.value,
+        )
+        if negative_cache_reason == NegativeCacheReason.NOT_STREAMABLE:
+            raise MediaNotStreamableException()
+        if negative_cache_reason == NegativeCacheReason.FORMAT_NOT_AVAILABLE:
+            yield download_info
+            raise MediaFormatNotAvailableException()
+
         if not media_metadata:
             logger.debug(f"[{colored_media_id}] Getting Song metadata")
             media_metadata = self.downloader.apple_music_api.get_song(media_id)
         download_info.media_metadata = media_metadata
 
         if not self.downloader.is_media_streamable(media_metadata):
+            self.downloader.add_negative_cache_entry(
+                media_id,
+                "",
+                NegativeCacheReason.NOT_STREAMABLE,
+            )
             raise MediaNotStreamableException()
 
         logger.debug(f"[{colored_media_id}] Getting lyrics")
@@ -705,6 +733,11 @@ class DownloaderSong:
             stream_info = self.get_stream_info(media_metadata)
 
             if not stream_info or not stream_info.audio_track.widevine_pssh:
+                self.downloader.add_negative_cache_entry(
+                    media_id,
+                    self.codec.value,
+                    NegativeCacheReason.FORMAT_NOT_AVAILABLE,
+                )
                 yield download_info
                 raise MediaFormatNotAvailableException()
 
@@ -111,3 +111,17 @@ class MediaRating(Enum):
 
     def __int__(self) -> int:
         return self.value
+
+
+class ApiEndpoint(Enum):
+    AMP_API = "amp-api"
+    WEBPLAYBACK = "webplayback"
+    LICENSE = "license"
+    ITUNES_LOOKUP = "itunes-lookup"
+    ITUNES_PAGE = "itunes-page"
+    ARTWORK = "artwork"
+
+
+class NegativeCacheReason(Enum):
+    NOT_STREAMABLE = "not-streamable"
+    FORMAT_NOT_AVAILABLE = "format-not-available"
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import threading
+import time
+import typing
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+import requests
+
+from .enums import ApiEndpoint
+from .retry import call_endpoint
+
+
+class _HedgeCancelled(Exception):
+    pass
+
+
+class RequestHedger:
+    WINDOW_SIZE = 200
+    MIN_SAMPLES = 20
+    MIN_DELAY = 0.05
+    PERCENTILE = 0.95
+
+    _executor = ThreadPoolExecutor(16, thread_name_prefix="gamdl_hedge")
+
+    def __init__(self, endpoint: ApiEndpoint):
+        self.endpoint = endpoint
+        self._latencies = deque(maxlen=self.WINDOW_SIZE)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float) -> None:
+        with self._lock:
+            self._latencies.append(latency)
+
+    def get_delay(self) -> float | None:
+        with self._lock:
+            if len(self._latencies) < self.MIN_SAMPLES:
+                return None
+            latencies = sorted(self._latencies)
+        return max(
+            latencies[int(len(latencies) * self.PERCENTILE) - 1],
+            self.MIN_DELAY,
+        )
+
+    def _timed_send(
+        self,
+        send: typing.Callable[[], requests.Response],
+    ) -> requests.Response:
+        start = time.monotonic()
+        response = send()
+        self.record(time.monotonic() - start)
+        return response
+
+    def _attempt(
+        self,
+        send: typing.Callable[[], requests.Response],
+        finished: threading.Event = None,
+    ) -> requests.Response:
+        def _send() -> requests.Response:
+            if finished is not None and finished.is_set():
+                raise _HedgeCancelled()
+            return self._timed_send(send)
+
+        return call_endpoint(self.endpoint, _send)
+
+    def call(
+        self,
+        send: typing.Callable[[], requests.Response],
+    ) -> requests.Response:
+        delay = self.get_delay()
+        if delay is None:
+            return self._attempt(send)
+
+        finished = threading.Event()
+        futures: set[Future] = {self._executor.submit(self._attempt, send)}
+        done, _ = wait(futures, timeout=delay)
+        if not done:
+            futures.add(self._executor.submit(self._attempt, send, finished))
+
+        try:
+            while True:
+                done, futures = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        return future.result()
+                if not futures:
+                    return done.pop().result()
+        finally:
+            finished.set()
+            for future in futures:
+                future.cancel()
+
+
+_hedgers: dict[ApiEndpoint, RequestHedger] = {}
+_hedgers_lock = threading.Lock()
+
+
+def get_hedger(endpoint: ApiEndpoint) -> RequestHedger:
+    with _hedgers_lock:
+        if endpoint not in _hedgers:
+            _hedgers[endpoint] = RequestHedger(endpoint)
+        return _hedgers[endpoint]
@@ -1,32 +1,54 @@
 from __future__ import annotations
 
-import functools
+import re
+import time
+from pathlib import Path
+from urllib.parse import urlparse
 
 import requests
 
 from .constants import STOREFRONT_IDS
-from .utils import raise_response_exception
+from .enums import ApiEndpoint
+from .hedging import get_hedger
+from .memory_cache import MemoryCache
+from .metadata_cache import MetadataCache
+from .retry import call_endpoint
+from .transport import get_transport
+from .utils import parse_json, raise_response_exception
 
 
 class ItunesApi:
     ITUNES_LOOKUP_API_URL = "https://itunes.apple.com/lookup"
     ITUNES_PAGE_API_URL = "https://music.apple.com"
+    RESOURCE_CACHE_MAX_ENTRIES = 512
+    RESOURCE_CACHE_TTL = 60 * 60
+    MAX_IDS_PER_LOOKUP = 150
+    ITUNES_PAGE_CACHE_MAX_ENTRIES = 64
+    ITUNES_PAGE_CACHE_TTL = 10 * 60
+    HLS_URL_EXPIRY_MARGIN = 5 * 60
 
     def __init__(
         self,
         storefront: str = "us",
         language: str = "en-US",
+        metadata_cache_path: Path = None,
+        hedge_requests: bool = False,
     ):
         self.storefront = storefront
         self.language = language
+        self.metadata_cache_path = metadata_cache_path
+        self.hedge_requests = hedge_requests
         self._setup_session()
+        self._set_metadata_cache()
+        self._set_resource_cache()
+        self._set_itunes_page_cache()
 
     def _setup_session(self):
         try:
             self.storefront_id = STOREFRONT_IDS[self.storefront.upper()]
         except KeyError:
             raise Exception(f"No storefront id for {self.storefront}")
-        self.session = requests.Session()
+        self.session = get_transport().create_session()
         self.session.params = {
             "country": self.storefront,
             "lang": self.language,
@@ -35,48 +57,246 @@ class ItunesApi:
             "X-Apple-Store-Front": f"{self.storefront_id} t:music31",
         }
 
-    @functools.lru_cache()
+    def _set_metadata_cache(self):
+        if self.metadata_cache_path is not None:
+            self.metadata_cache = MetadataCache(self.metadata_cache_path)
+        else:
+            self.metadata_cache = None
+
+    def _set_resource_cache(self):
+        self.resource_cache = MemoryCache(
+            max_entries=self.RESOURCE_CACHE_MAX_ENTRIES,
+            ttl=self.RESOURCE_CACHE_TTL,
+            name="iTunes resource",
+        )
+
+    def _set_itunes_page_cache(self):
+        self.itunes_page_cache = MemoryCache(
+            max_entries=self.ITUNES_PAGE_CACHE_MAX_ENTRIES,
+            ttl=self.ITUNES_PAGE_CACHE_TTL,
+            name="iTunes page",
+        )
+
+    def _request(
+        self,
+        endpoint: ApiEndpoint,
+        url: str,
+        **kwargs,
+    ) -> requests.Response:
+        kwargs.setdefault("timeout", get_transport().get_timeout(endpoint))
+        send = lambda: self.session.get(url, **kwargs)
+        if self.hedge_requests:
+            return get_hedger(endpoint).call(send)
+        return call_endpoint(endpoint, send)
+
     def get_resource(
         self,
         resource_id: str,
         entity: str = "album",
     ) -> dict | None:
-        response = self.session.get(
+        return self.resource_cache.get_or_set(
+            (resource_id, entity),
+            lambda: self._get_resource(resource_id, entity),
+        )
+
+    def _get_resource_cache_key(
+        self,
+        resource_id: str,
+        entity: str,
+    ) -> str | None:
+        if self.metadata_cache is None:
+            return None
+        return self.metadata_cache.get_key(
+            self.storefront,
+            self.language,
+            "itunes-lookup",
+            resource_id,
+            entity,
+        )
+
+    def _lookup(
+        self,
+        resource_ids: list[str],
+        entity: str,
+    ) -> list[dict]:
+        response = self._request(
+            ApiEndpoint.ITUNES_LOOKUP,
             self.ITUNES_LOOKUP_API_URL,
             params={
-                "id": resource_id,
+                "id": ",".join(resource_ids),
                 "entity": entity,
             },
         )
         try:
             response.raise_for_status()
-            response_dict = response.json()
+            response_dict = parse_json(response.content)
         except (
             requests.HTTPError,
-            requests.exceptions.JSONDecodeError,
+            ValueError,
         ):
             raise_response_exception(response)
-        if response_dict.get("results"):
-            return response_dict["results"]
-        return None
+        return response_dict.get("results", [])
+
+    def _get_resource(
+        self,
+        resource_id: str,
+        entity: str,
+    ) -> dict | None:
+        cache_key = self._get_resource_cache_key(resource_id, entity)
+        if cache_key is not None:
+            cache_entry = self.metadata_cache.get(cache_key)
+            if cache_entry is not None and not cache_entry.is_expired():
+                return cache_entry.data or None
+
+        results = self._lookup([resource_id], entity)
+        if cache_key is not None:
+            self.metadata_cache.set(cache_key, results, "itunes-lookup")
+        return results or None
+
+    @staticmethod
+    def _group_lookup_results(
+        resource_ids: list[str],
+        results: list[dict],
+    ) -> dict[str, list[dict]]:
+        collections = {
+            result["collectionId"]: result
+            for result in results
+            if result.get("wrapperType") == "collection"
+        }
+        grouped_results = {}
+        for result in results:
+            if result.get("wrapperType") == "collection":
+                resource_id = str(result["collectionId"])
+            else:
+                resource_id = str(result.get("trackId", result.get("artistId")))
+            if resource_id not in resource_ids or resource_id in grouped_results:
+                continue
+            grouped_results[resource_id] = [result]
+            collection = collections.get(result.get("collectionId"))
+            if collection is not None and collection is not result:
+                grouped_results[resource_id].append(collection)
+        return grouped_results
+
+    def prefetch_resources(
+        self,
+        resource_ids: list[str],
+        entity: str = "album",
+    ) -> None:
+        resource_ids = [
+            resource_id
+            for resource_id in dict.fromkeys(resource_ids)
+            if (resource_id, entity) not in self.resource_cache
+        ]
+        cache_keys = {}
+        cache_entries = {}
+        if self.metadata_cache is not None:
+            cache_keys = {
+                resource_id: self._get_resource_cache_key(resource_id, entity)
+                for resource_id in resource_ids
+            }
+            cache_entries = self.metadata_cache.get_many(list(cache_keys.values()))
+        missing_resource_ids = []
+        for resource_id in resource_ids:
+            cache_entry = cache_entries.get(cache_keys.get(resource_id))
+            if cache_entry is not None and not cache_entry.is_expired():
+                self.resource_cache.set(
+                    (resource_id, entity),
+                    cache_entry.data or None,
+                )
+                continue
+            missing_resource_ids.append(resource_id)
+
+        for i in range(0, len(missing_resource_ids), self.MAX_IDS_PER_LOOKUP):
+            resource_ids_chunk = missing_resource_ids[i : i + self.MAX_IDS_PER_LOOKUP]
+            grouped_results = self._group_lookup_results(
+                resource_ids_chunk,
+                self._lookup(resource_ids_chunk, entity),
+            )
+            for resource_id in resource_ids_chunk:
+                self.resource_cache.set(
+                    (resource_id, entity),
+                    grouped_results.get(resource_id) or None,
+                )
+            if self.metadata_cache is not None:
+                self.metadata_cache.set_many(
+                    [
+                        (
+                            cache_keys[resource_id],
+                            grouped_results.get(resource_id, []),
+                        )
+                        for resource_id in resource_ids_chunk
+                    ],
+                    "itunes-lookup",
+                )
 
     def get_itunes_page(
         self,
         resource_type: str,
         resource_id: str,
     ) -> dict | None:
-        response = self.session.get(
-            f"{self.ITUNES_PAGE_API_URL}/{resource_type}/{resource_id}"
+        return self.itunes_page_cache.get_or_set(
+            (resource_type, resource_id),
+            lambda: self._get_itunes_page(resource_type, resource_id),
+        )
+
+    def _get_itunes_page_ttl(self, itunes_page: dict | None) -> float | None:
+        try:
+            hls_url = itunes_page["offers"][0]["assets"][0]["hlsUrl"]
+        except (IndexError, KeyError, TypeError):
+            return None
+
+        expires_at_match = re.search(
+            r"(?:^|[&~=])(?:exp|expires|expiry)=(\d+)",
+            urlparse(hls_url).query,
+        )
+        if expires_at_match is None:
+            return None
+        expires_at = int(expires_at_match.group(1))
+        if expires_at > 10**12:
+            expires_at /= 1000
+        return min(
+            max(expires_at - time.time() - self.HLS_URL_EXPIRY_MARGIN, 0),
+            self.metadata_cache.get_ttl("itunes-page"),
+        )
+
+    def _get_itunes_page(
+        self,
+        resource_type: str,
+        resource_id: str,
+    ) -> dict | None:
+        cache_key = None
+        if self.metadata_cache is not None:
+            cache_key = self.metadata_cache.get_key(
+                self.storefront,
+                self.language,
+                "itunes-page",
+                resource_type,
+                resource_id,
+            )
+            cache_entry = self.metadata_cache.get(cache_key)
+            if cache_entry is not None and not cache_entry.is_expired():
+                return cache_entry.data
+
+        response = self._request(
+            ApiEndpoint.ITUNES_PAGE,
+            f"{self.ITUNES_PAGE_API_URL}/{resource_type}/{resource_id}",
         )
         try:
             response.raise_for_status()
-            response_dict = response.json()
+            response_dict = parse_json(response.content)
             itunes_page = response_dict["storePlatformData"]["product-dv"][
                 "results"
             ].get(resource_id)
         except (
             requests.HTTPError,
-            requests.exceptions.JSONDecodeError,
+            ValueError,
         ):
             raise_response_exception(response)
+        if cache_key is not None:
+            self.metadata_cache.set(
+                cache_key,
+                itunes_page,
+                "itunes-page",
+                ttl=self._get_itunes_page_ttl(itunes_page),
+            )
         return itunes_page
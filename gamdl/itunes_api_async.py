@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from .constants import STOREFRONT_IDS
+from .enums import ApiEndpoint
+from .itunes_api import ItunesApi
+from .retry import call_endpoint_async
+from .transport import Transport, get_transport
+from .utils import parse_json, raise_response_exception
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+class AsyncItunesApi:
+    ITUNES_LOOKUP_API_URL = ItunesApi.ITUNES_LOOKUP_API_URL
+    ITUNES_PAGE_API_URL = ItunesApi.ITUNES_PAGE_API_URL
+
+    def __init__(
+        self,
+        storefront: str = "us",
+        language: str = "en-US",
+        max_connections: int = Transport.ASYNC_MAX_CONNECTIONS,
+    ):
+        self.storefront = storefront
+        self.language = language
+        self.max_connections = max_connections
+        self._setup_client()
+
+    def _setup_client(self):
+        try:
+            self.storefront_id = STOREFRONT_IDS[self.storefront.upper()]
+        except KeyError:
+            raise Exception(f"No storefront id for {self.storefront}")
+        self.client = get_transport().create_async_client(self.max_connections)
+        self.client.params = {
+            "country": self.storefront,
+            "lang": self.language,
+        }
+        self.client.headers["X-Apple-Store-Front"] = f"{self.storefront_id} t:music31"
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def __aenter__(self) -> AsyncItunesApi:
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
+
+    async def _request(
+        self,
+        endpoint: ApiEndpoint,
+        url: str,
+        **kwargs,
+    ) -> httpx.Response:
+        kwargs.setdefault("timeout", get_transport().get_async_timeout(endpoint))
+        return await call_endpoint_async(
+            endpoint,
+            lambda: self.client.get(url, **kwargs),
+        )
+
+    async def get_resource(
+        self,
+        resource_id: str,
+        entity: str = "album",
+    ) -> dict | None:
+        response = await self._request(
+            ApiEndpoint.ITUNES_LOOKUP,
+            self.ITUNES_LOOKUP_API_URL,
+            params={
+                "id": resource_id,
+                "entity": entity,
+            },
+        )
+        try:
+            response.raise_for_status()
+            response_dict = parse_json(response.content)
+        except (
+            httpx.HTTPStatusError,
+            ValueError,
+        ):
+            raise_response_exception(response)
+        if response_dict.get("results"):
+            return response_dict["results"]
+        return None
+
+    async def get_itunes_page(
+        self,
+        resource_type: str,
+        resource_id: str,
+    ) -> dict | None:
+        response = await self._request(
+            ApiEndpoint.ITUNES_PAGE,
+            f"{self.ITUNES_PAGE_API_URL}/{resource_type}/{resource_id}",
+        )
+        try:
+            response.raise_for_status()
+            response_dict = parse_json(response.content)
+            itunes_page = response_dict["storePlatformData"]["product-dv"][
+                "results"
+            ].get(resource_id)
+        except (
+            httpx.HTTPStatusError,
+            ValueError,
+        ):
+            raise_response_exception(response)
+        return itunes_page
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import threading
+import time
+import typing
+from collections import OrderedDict
+
+from .models import CacheStats
+from .single_flight import SingleFlight
+
+_MISSING = object()
+
+
+class MemoryCache:
+    def __init__(
+        self,
+        max_entries: int = None,
+        max_bytes: int = None,
+        ttl: float = None,
+        get_size: typing.Callable[[typing.Any], int] = None,
+        name: str = None,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.get_size = get_size
+        self.name = name
+        self._entries: OrderedDict[typing.Hashable, tuple[typing.Any, int, float]] = (
+            OrderedDict()
+        )
+        self._size = 0
+        self._lock = threading.Lock()
+        self._single_flight = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _get_value_size(self, value: typing.Any) -> int:
+        if self.get_size is None or value is None:
+            return 0
+        return self.get_size(value)
+
+    def _remove(self, key: typing.Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._size -= size
+
+    def _evict(self) -> None:
+        while self._entries and (
+            (self.max_entries is not None and len(self._entries) > self.max_entries)
+            or (self.max_bytes is not None and self._size > self.max_bytes)
+        ):
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def __contains__(self, key: typing.Hashable) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[2] >= time.monotonic()
+
+    def get(
+        self,
+        key: typing.Hashable,
+        default: typing.Any = None,
+    ) -> typing.Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] < time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(
+        self,
+        key: typing.Hashable,
+        value: typing.Any,
+    ) -> None:
+        size = self._get_value_size(value)
+        expires_at = (
+            time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+        )
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self._entries[key] = (value, size, expires_at)
+            self._size += size
+            self._evict()
+
+    def get_or_set(
+        self,
+        key: typing.Hashable,
+        func: typing.Callable[[], typing.Any],
+    ) -> typing.Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = self._single_flight.do(
+                key,
+                lambda: self._load(key, func),
+            )
+        return value
+
+    def _load(
+        self,
+        key: typing.Hashable,
+        func: typing.Callable[[], typing.Any],
+    ) -> typing.Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] >= time.monotonic():
+                self._entries.move_to_end(key)
+                return entry[0]
+        value = func()
+        self.set(key, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def get_stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                entries=len(self._entries),
+                size=self._size,
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                coalesced=self._single_flight.coalesced,
+            )
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+from pathlib import Path
+
+from .models import MetadataCacheEntry
+from .utils import parse_json
+
+
+class MetadataCache:
+    INITIAL_QUERY = """
+        CREATE TABLE IF NOT EXISTS metadata (
+            cache_key TEXT PRIMARY KEY,
+            data TEXT NOT NULL,
+            etag TEXT,
+            expires_at REAL NOT NULL
+        )
+    """
+    SET_ENTRY_QUERY = """
+        INSERT OR REPLACE INTO metadata (cache_key, data, etag, expires_at)
+        VALUES (?, ?, ?, ?)
+    """
+    GET_ENTRY_QUERY = """
+        SELECT data, etag, expires_at FROM metadata WHERE cache_key = ?
+    """
+    GET_ENTRIES_QUERY = """
+        SELECT cache_key, data, etag, expires_at FROM metadata
+        WHERE cache_key IN ({})
+    """
+    TOUCH_ENTRY_QUERY = """
+        UPDATE metadata SET expires_at = ? WHERE cache_key = ?
+    """
+    MAX_KEYS_PER_QUERY = 500
+    DEFAULT_TTL = 24 * 60 * 60
+    TTLS = {
+        "songs": 7 * 24 * 60 * 60,
+        "albums": 24 * 60 * 60,
+        "artists": 24 * 60 * 60,
+        "playlists": 6 * 60 * 60,
+        "music-videos": 7 * 24 * 60 * 60,
+        "uploaded-videos": 7 * 24 * 60 * 60,
+        "itunes-lookup": 7 * 24 * 60 * 60,
+        "itunes-page": 6 * 60 * 60,
+        "availability": 24 * 60 * 60,
+        "search": 24 * 60 * 60,
+    }
+
+    def __init__(self, file_path: Path):
+        self.file_path = file_path
+        self._initialize_db()
+
+    def _initialize_db(self):
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with sqlite3.connect(self.file_path) as conn:
+            conn.execute(self.INITIAL_QUERY)
+            conn.commit()
+
+    @staticmethod
+    def get_key(*parts: str | dict | None) -> str:
+        return "|".join(
+            (json.dumps(part, sort_keys=True) if isinstance(part, dict) else str(part))
+            for part in parts
+        )
+
+    def get_ttl(self, resource_type: str) -> float:
+        return self.TTLS.get(resource_type, self.DEFAULT_TTL)
+
+    def get(self, cache_key: str) -> MetadataCacheEntry | None:
+        with sqlite3.connect(self.file_path) as conn:
+            cursor = conn.execute(
+                self.GET_ENTRY_QUERY,
+                (cache_key,),
+            )
+            result = cursor.fetchone()
+        if not result:
+            return None
+        return MetadataCacheEntry(
+            data=parse_json(result[0]),
+            etag=result[1],
+            expires_at=result[2],
+        )
+
+    def get_many(self, cache_keys: list[str]) -> dict[str, MetadataCacheEntry]:
+        entries = {}
+        with sqlite3.connect(self.file_path) as conn:
+            for i in range(0, len(cache_keys), self.MAX_KEYS_PER_QUERY):
+                cache_keys_chunk = cache_keys[i : i + self.MAX_KEYS_PER_QUERY]
+                cursor = conn.execute(
+                    self.GET_ENTRIES_QUERY.format(
+                        ",".join("?" for _ in cache_keys_chunk)
+                    ),
+                    cache_keys_chunk,
+                )
+                for cache_key, data, etag, expires_at in cursor:
+                    entries[cache_key] = MetadataCacheEntry(
+                        data=parse_json(data),
+                        etag=etag,
+                        expires_at=expires_at,
+                    )
+        return entries
+
+    def set(
+        self,
+        cache_key: str,
+        data: dict | list,
+        resource_type: str,
+        etag: str = None,
+        ttl: float = None,
+    ):
+        with sqlite3.connect(self.file_path) as conn:
+            conn.execute(
+                self.SET_ENTRY_QUERY,
+                (
+                    cache_key,
+                    json.dumps(data),
+                    etag,
+                    time.time()
+                    + (ttl if ttl is not None else self.get_ttl(resource_type)),
+                ),
+            )
+            conn.commit()
+
+    def set_many(
+        self,
+        entries: list[tuple[str, dict | list]],
+        resource_type: str,
+        ttl: float = None,
+    ):
+        expires_at = time.time() + (
+            ttl if ttl is not None else self.get_ttl(resource_type)
+        )
+        with sqlite3.connect(self.file_path) as conn:
+            conn.executemany(
+                self.SET_ENTRY_QUERY,
+                [
+                    (cache_key, json.dumps(data), None, expires_at)
+                    for cache_key, data in entries
+                ],
+            )
+            conn.commit()
+
+    def touch(
+        self,
+        cache_key: str,
+        resource_type: str,
+    ):
+        with sqlite3.connect(self.file_path) as conn:
+            conn.execute(
+                self.TOUCH_ENTRY_QUERY,
+                (
+                    time.time() + self.get_ttl(resource_type),
+                    cache_key,
+                ),
+            )
+            conn.commit()
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import datetime
+import time
 import typing
 from dataclasses import dataclass
 from pathlib import Path
@@ -20,10 +21,27 @@ class UrlInfo:
     library_id: str = None
 
 
+@dataclass(slots=True)
+class DownloadQueueItem:
+    id: str = None
+    type: str = None
+    name: str = None
+    playlist_index: int = None
+
+
+@dataclass
+class ArtistSnapshotInfo:
+    artist_id: str = None
+    media_type: str = None
+    media_ids: list[str] = None
+
+
 @dataclass
 class DownloadQueue:
     playlist_attributes: dict = None
-    medias_metadata: list[dict] = None
+    total: int = None
+    items: typing.Iterator[DownloadQueueItem] = None
+    artist_snapshot_info: ArtistSnapshotInfo = None
 
 
 @dataclass
@@ -177,3 +195,39 @@ class DownloadInfo:
     decryption_key: DecryptionKeyAv = None
     staged_path: Path = None
     synced_lyrics_path: Path = None
+
+
+@dataclass
+class MetadataCacheEntry:
+    data: dict | list = None
+    etag: str = None
+    expires_at: float = None
+
+    def is_expired(self) -> bool:
+        return self.expires_at <= time.time()
+
+
+@dataclass
+class CacheStats:
+    entries: int = None
+    size: int = None
+    hits: int = None
+    misses: int = None
+    evictions: int = None
+    coalesced: int = None
+
+
+@dataclass
+class SearchQuery:
+    line: str = None
+    artist: str = None
+    title: str = None
+    isrc: str = None
+    duration_in_millis: int = None
+
+
+@dataclass
+class SearchMatch:
+    query: SearchQuery = None
+    song: dict = None
+    score: float = None
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import sqlite3
+import time
+from pathlib import Path
+
+from .enums import NegativeCacheReason
+
+
+class NegativeCache:
+    INITIAL_QUERY = """
+        CREATE TABLE IF NOT EXISTS negative_cache (
+            media_id TEXT NOT NULL,
+            codec TEXT NOT NULL,
+            storefront TEXT NOT NULL,
+            reason TEXT NOT NULL,
+            expires_at REAL NOT NULL,
+            PRIMARY KEY (media_id, codec, storefront)
+        )
+    """
+    ADD_ENTRY_QUERY = """
+        INSERT OR REPLACE INTO negative_cache
+        (media_id, codec, storefront, reason, expires_at)
+        VALUES (?, ?, ?, ?, ?)
+    """
+    GET_ENTRY_QUERY = """
+        SELECT reason FROM negative_cache
+        WHERE media_id = ? AND codec IN (?, '') AND storefront = ? AND expires_at > ?
+        ORDER BY codec = '' DESC
+    """
+
+    def __init__(self, file_path: Path, ttl: float):
+        self.file_path = file_path
+        self.ttl = ttl
+        self._initialize_db()
+
+    def _initialize_db(self):
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with sqlite3.connect(self.file_path) as conn:
+            conn.execute(self.INITIAL_QUERY)
+            conn.commit()
+
+    def add(
+        self,
+        media_id: str,
+        codec: str,
+        storefront: str,
+        reason: NegativeCacheReason,
+    ):
+        with sqlite3.connect(self.file_path) as conn:
+            conn.execute(
+                self.ADD_ENTRY_QUERY,
+                (
+                    media_id,
+                    codec,
+                    storefront,
+                    reason.value,
+                    time.time() + self.ttl,
+                ),
+            )
+            conn.commit()
+
+    def get(
+        self,
+        media_id: str,
+        codec: str,
+        storefront: str,
+    ) -> NegativeCacheReason | None:
+        with sqlite3.connect(self.file_path) as conn:
+            cursor = conn.execute(
+                self.GET_ENTRY_QUERY,
+                (
+                    media_id,
+                    codec,
+                    storefront,
+                    time.time(),
+                ),
+            )
+            result = cursor.fetchone()
+            if result:
+                return NegativeCacheReason(result[0])
+            return None
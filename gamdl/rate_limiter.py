@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+import typing
+
+import requests
+
+from .enums import ApiEndpoint
+from .utils import get_retry_after
+
+logger = logging.getLogger("gamdl")
+
+
+class RateLimiter:
+    THROTTLE_STATUS_CODES = (429, 503)
+    RETRY_STATUS_CODES = (429,)
+    DEFAULT_PAUSE = 2
+    MAX_RETRIES = 5
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        max_rate: float = None,
+        min_rate: float = None,
+        name: str = None,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.max_rate = max_rate if max_rate is not None else rate
+        self.min_rate = min_rate if min_rate is not None else rate / 16
+        self.name = name
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(
+            self.burst,
+            self._tokens + (now - self._updated_at) * self.rate,
+        )
+        self._updated_at = now
+
+    def _try_acquire(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now >= self._paused_until and self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return max(
+                self._paused_until - now,
+                (1 - self._tokens) / self.rate,
+            )
+
+    def acquire(self) -> None:
+        while wait_time := self._try_acquire():
+            time.sleep(wait_time)
+
+    async def acquire_async(self) -> None:
+        while wait_time := self._try_acquire():
+            await asyncio.sleep(wait_time)
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._paused_until = max(
+                self._paused_until,
+                time.monotonic() + seconds,
+            )
+
+    def update(self, response: requests.Response) -> None:
+        if response.status_code in self.THROTTLE_STATUS_CODES:
+            retry_after = get_retry_after(response, self.DEFAULT_PAUSE)
+            with self._lock:
+                self.rate = max(self.rate / 2, self.min_rate)
+                self._tokens = 0
+            self.pause(retry_after)
+            logger.debug(
+                f"Throttled by {self.name} ({response.status_code}), "
+                f"waiting {retry_after:.1f}s and slowing down to {self.rate:.2f} req/s"
+            )
+        elif self.rate < self.max_rate:
+            with self._lock:
+                self.rate = min(self.rate + self.min_rate, self.max_rate)
+
+    def call(
+        self,
+        send: typing.Callable[[], requests.Response],
+    ) -> requests.Response:
+        for _ in range(self.MAX_RETRIES + 1):
+            self.acquire()
+            response = send()
+            self.update(response)
+            if response.status_code not in self.RETRY_STATUS_CODES:
+                break
+        return response
+
+    async def call_async(
+        self,
+        send: typing.Callable[[], typing.Awaitable[typing.Any]],
+    ) -> typing.Any:
+        for _ in range(self.MAX_RETRIES + 1):
+            await self.acquire_async()
+            response = await send()
+            self.update(response)
+            if response.status_code not in self.RETRY_STATUS_CODES:
+                break
+        return response
+
+
+RATE_LIMITER_SETTINGS = {
+    ApiEndpoint.AMP_API: {"rate": 10, "burst": 10, "max_rate": 20},
+    ApiEndpoint.WEBPLAYBACK: {"rate": 2, "burst": 4, "max_rate": 5},
+    ApiEndpoint.LICENSE: {"rate": 2, "burst": 4, "max_rate": 5},
+    ApiEndpoint.ITUNES_LOOKUP: {"rate": 2, "burst": 10, "max_rate": 5},
+    ApiEndpoint.ITUNES_PAGE: {"rate": 2, "burst": 4, "max_rate": 5},
+    ApiEndpoint.ARTWORK: {"rate": 20, "burst": 20, "max_rate": 50},
+}
+
+_rate_limiters: dict[ApiEndpoint, RateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(endpoint: ApiEndpoint) -> RateLimiter:
+    with _rate_limiters_lock:
+        if endpoint not in _rate_limiters:
+            _rate_limiters[endpoint] = RateLimiter(
+                **RATE_LIMITER_SETTINGS[endpoint],
+                name=endpoint.value,
+            )
+        return _rate_limiters[endpoint]
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import threading
+import time
+import typing
+from dataclasses import dataclass
+
+import requests
+
+from .enums import ApiEndpoint
+from .rate_limiter import RateLimiter, get_rate_limiter
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+logger = logging.getLogger("gamdl")
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 5
+    base_delay: float = 1
+    max_delay: float = 30
+    retry_status_codes: tuple[int, ...] = (500, 502, 503, 504)
+
+    def get_delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+IDEMPOTENT_RETRY_POLICY = RetryPolicy()
+LICENSE_RETRY_POLICY = RetryPolicy(max_attempts=3, base_delay=2, max_delay=10)
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        failure_threshold: int = 10,
+        reset_timeout: float = 60,
+        name: str = None,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.name = name
+        self._failure_count = 0
+        self._opened_until = 0.0
+        self._lock = threading.Lock()
+
+    def get_wait_time(self) -> float:
+        with self._lock:
+            return max(self._opened_until - time.monotonic(), 0)
+
+    def wait(self) -> None:
+        wait_time = self.get_wait_time()
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+    async def wait_async(self) -> None:
+        wait_time = self.get_wait_time()
+        if wait_time > 0:
+            await asyncio.sleep(wait_time)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failure_count = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failure_count += 1
+            if self._failure_count < self.failure_threshold:
+                return
+            self._failure_count = 0
+            self._opened_until = time.monotonic() + self.reset_timeout
+        logger.warning(
+            f"Requests to {self.name} keep failing, "
+            f"pausing them for {self.reset_timeout}s"
+        )
+
+
+_circuit_breakers: dict[ApiEndpoint, CircuitBreaker] = {}
+_circuit_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(endpoint: ApiEndpoint) -> CircuitBreaker:
+    with _circuit_breakers_lock:
+        if endpoint not in _circuit_breakers:
+            _circuit_breakers[endpoint] = CircuitBreaker(name=endpoint.value)
+        return _circuit_breakers[endpoint]
+
+
+def get_retry_policy(endpoint: ApiEndpoint) -> RetryPolicy:
+    if endpoint == ApiEndpoint.LICENSE:
+        return LICENSE_RETRY_POLICY
+    return IDEMPOTENT_RETRY_POLICY
+
+
+def call_endpoint(
+    endpoint: ApiEndpoint,
+    send: typing.Callable[[], requests.Response],
+    rate_limiter: RateLimiter = None,
+) -> requests.Response:
+    if rate_limiter is None:
+        rate_limiter = get_rate_limiter(endpoint)
+    circuit_breaker = get_circuit_breaker(endpoint)
+    retry_policy = get_retry_policy(endpoint)
+
+    for attempt in range(retry_policy.max_attempts):
+        is_last_attempt = attempt == retry_policy.max_attempts - 1
+        circuit_breaker.wait()
+
+        try:
+            response = rate_limiter.call(send)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if is_last_attempt:
+                circuit_breaker.record_failure()
+                raise
+            error = str(e)
+        else:
+            if response.status_code not in retry_policy.retry_status_codes:
+                if response.status_code not in RateLimiter.RETRY_STATUS_CODES:
+                    circuit_breaker.record_success()
+                return response
+            if is_last_attempt:
+                circuit_breaker.record_failure()
+                return response
+            error = f"status code {response.status_code}"
+
+        delay = retry_policy.get_delay(attempt)
+        logger.debug(
+            f"Request to {endpoint.value} failed with {error}, "
+            f"retrying in {delay:.1f}s ({attempt + 1}/{retry_policy.max_attempts})"
+        )
+        time.sleep(delay)
+
+
+async def call_endpoint_async(
+    endpoint: ApiEndpoint,
+    send: typing.Callable[[], typing.Awaitable[httpx.Response]],
+) -> httpx.Response:
+    rate_limiter = get_rate_limiter(endpoint)
+    circuit_breaker = get_circuit_breaker(endpoint)
+    retry_policy = get_retry_policy(endpoint)
+
+    for attempt in range(retry_policy.max_attempts):
+        is_last_attempt = attempt == retry_policy.max_attempts - 1
+        await circuit_breaker.wait_async()
+
+        try:
+            response = await rate_limiter.call_async(send)
+        except httpx.TransportError as e:
+            if is_last_attempt:
+                circuit_breaker.record_failure()
+                raise
+            error = str(e) or type(e).__name__
+        else:
+            if response.status_code not in retry_policy.retry_status_codes:
+                if response.status_code not in RateLimiter.RETRY_STATUS_CODES:
+                    circuit_breaker.record_success()
+                return response
+            if is_last_attempt:
+                circuit_breaker.record_failure()
+                return response
+            error = f"status code {response.status_code}"
+
+        delay = retry_policy.get_delay(attempt)
+        logger.debug(
+            f"Request to {endpoint.value} failed with {error}, "
+            f"retrying in {delay:.1f}s ({attempt + 1}/{retry_policy.max_attempts})"
+        )
+        await asyncio.sleep(delay)
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import logging
+import re
+import typing
+from concurrent.futures import ThreadPoolExecutor
+from difflib import SequenceMatcher
+
+from .apple_music_api import AppleMusicApi
+from .memory_cache import MemoryCache
+from .models import SearchMatch, SearchQuery
+
+logger = logging.getLogger("gamdl")
+
+
+class SearchResolver:
+    ISRC_RE = r"^[A-Z]{2}[A-Z0-9]{3}[0-9]{7}$"
+    DURATION_RE = (
+        r"^(?:(?P<hours>[0-9]+):)?(?P<minutes>[0-9]{1,2}):(?P<seconds>[0-9]{2})$"
+    )
+    TITLE_NOISE_RE = r"\s*[\(\[](?:feat\.?|ft\.?|with|remaster(?:ed)?)[^\)\]]*[\)\]]"
+    SEARCH_LIMIT = 10
+    MIN_SCORE = 0.6
+    DURATION_TOLERANCE = 10_000
+    TITLE_WEIGHT = 0.5
+    ARTIST_WEIGHT = 0.3
+    DURATION_WEIGHT = 0.2
+    SEARCH_CACHE_MAX_ENTRIES = 4096
+
+    def __init__(
+        self,
+        apple_music_api: AppleMusicApi,
+        max_workers: int = 8,
+    ):
+        self.apple_music_api = apple_music_api
+        self.max_workers = max_workers
+        self._set_search_cache()
+
+    def _set_search_cache(self):
+        self.search_cache = MemoryCache(
+            max_entries=self.SEARCH_CACHE_MAX_ENTRIES,
+            name="Search",
+        )
+
+    def parse_line(self, line: str) -> SearchQuery | None:
+        fields = [field.strip() for field in line.split("\t")]
+        if not fields[0]:
+            return None
+
+        query = SearchQuery(line=line)
+        if " - " in fields[0]:
+            query.artist, query.title = (
+                part.strip() for part in fields[0].split(" - ", 1)
+            )
+        else:
+            query.title = fields[0]
+
+        for field in fields[1:]:
+            if re.match(self.ISRC_RE, field.upper()):
+                query.isrc = field.upper()
+                continue
+            duration_match = re.match(self.DURATION_RE, field)
+            if duration_match:
+                query.duration_in_millis = (
+                    int(duration_match.group("hours") or 0) * 3600
+                    + int(duration_match.group("minutes")) * 60
+                    + int(duration_match.group("seconds"))
+                ) * 1000
+        return query
+
+    def _normalize(self, text: str) -> str:
+        text = re.sub(self.TITLE_NOISE_RE, "", text.lower(), flags=re.IGNORECASE)
+        return " ".join(re.sub(r"[^\w\s]", " ", text).split())
+
+    def _get_similarity(self, a: str, b: str) -> float:
+        return SequenceMatcher(None, self._normalize(a), self._normalize(b)).ratio()
+
+    def get_score(self, query: SearchQuery, song: dict) -> float:
+        attributes = song["attributes"]
+        if query.isrc and attributes.get("isrc") == query.isrc:
+            return 1.0
+
+        scores = [
+            (
+                self.TITLE_WEIGHT,
+                self._get_similarity(query.title, attributes["name"]),
+            )
+        ]
+        if query.artist:
+            scores.append(
+                (
+                    self.ARTIST_WEIGHT,
+                    self._get_similarity(query.artist, attributes["artistName"]),
+                )
+            )
+        if query.duration_in_millis and attributes.get("durationInMillis"):
+            scores.append(
+                (
+                    self.DURATION_WEIGHT,
+                    1
+                    - min(
+                        abs(query.duration_in_millis - attributes["durationInMillis"])
+                        / self.DURATION_TOLERANCE,
+                        1,
+                    ),
+                )
+            )
+        return sum(weight * score for weight, score in scores) / sum(
+            weight for weight, _ in scores
+        )
+
+    def _search(self, term: str) -> list[dict]:
+        results = self.apple_music_api.search(
+            term,
+            types="songs",
+            limit=self.SEARCH_LIMIT,
+        )
+        return (results or {}).get("songs", {}).get("data", [])
+
+    def resolve(self, query: SearchQuery) -> SearchMatch:
+        term = " ".join(part for part in (query.artist, query.title) if part)
+        match = SearchMatch(query=query, score=0.0)
+        try:
+            songs = self.search_cache.get_or_set(
+                self._normalize(term),
+                lambda: self._search(term),
+            )
+        except Exception as e:
+            logger.debug(f'Search failed for "{query.line}": {e}')
+            return match
+        for song in songs:
+            score = self.get_score(query, song)
+            if score > match.score:
+                match.song = song
+                match.score = score
+        if match.score < self.MIN_SCORE:
+            match.song = None
+        return match
+
+    def resolve_lines(
+        self,
+        lines: typing.Iterable[str],
+    ) -> typing.Generator[SearchMatch, None, None]:
+        queries = [
+            query for query in (self.parse_line(line) for line in lines) if query
+        ]
+        with ThreadPoolExecutor(self.max_workers) as executor:
+            yield from executor.map(self.resolve, queries)
+
+    def get_song_url(self, song: dict) -> str:
+        return song["attributes"].get(
+            "url",
+            f"{self.apple_music_api.APPLE_MUSIC_HOMEPAGE_URL}"
+            f"/{self.apple_music_api.storefront}/song/{song['id']}",
+        )
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import threading
+import typing
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.exception = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls: dict[typing.Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(
+        self,
+        key: typing.Hashable,
+        func: typing.Callable[[], typing.Any],
+    ) -> typing.Any:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                is_leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                is_leader = True
+
+        if not is_leader:
+            call.event.wait()
+            if call.exception is not None:
+                raise call.exception
+            return call.value
+
+        try:
+            call.value = func()
+        except Exception as e:
+            call.exception = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.value
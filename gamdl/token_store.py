@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import base64
+import json
+import time
+from pathlib import Path
+
+
+class TokenStore:
+    EXPIRY_MARGIN = 3600
+
+    def __init__(self, file_path: Path):
+        self.file_path = file_path
+
+    @staticmethod
+    def get_token_expiry(token: str) -> int | None:
+        try:
+            payload = token.split(".")[1]
+            payload += "=" * (-len(payload) % 4)
+            return int(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+        except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+            return None
+
+    def is_token_valid(self, token: str) -> bool:
+        expires_at = self.get_token_expiry(token)
+        if expires_at is None:
+            return False
+        return expires_at - self.EXPIRY_MARGIN > time.time()
+
+    def load(self) -> str | None:
+        if not self.file_path.exists():
+            return None
+
+        try:
+            token_data = json.loads(self.file_path.read_text(encoding="utf-8"))
+            token = token_data.get("token")
+        except (AttributeError, OSError, ValueError):
+            return None
+
+        if not self.is_token_valid(token):
+            return None
+        return token
+
+    def save(self, token: str) -> None:
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        self.file_path.write_text(
+            json.dumps(
+                {
+                    "token": token,
+                    "expires_at": self.get_token_expiry(token),
+                }
+            ),
+            encoding="utf-8",
+        )
@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import http.client
+import threading
+from urllib.parse import urljoin
+
+import m3u8
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.cookies import extract_cookies_to_jar
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from .enums import ApiEndpoint
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    def __init__(
+        self,
+        timeout: float | tuple[float, float],
+        **kwargs,
+    ):
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+class Http2RawResponse:
+    def __init__(self, headers: httpx.Headers):
+        self.msg = http.client.HTTPMessage()
+        for key, value in headers.multi_items():
+            self.msg[key] = value
+        self._original_response = self
+
+    def close(self):
+        pass
+
+
+class Http2Adapter(BaseAdapter):
+    HOP_BY_HOP_HEADERS = {
+        "connection",
+        "keep-alive",
+        "proxy-connection",
+        "transfer-encoding",
+        "upgrade",
+    }
+
+    def __init__(
+        self,
+        timeout: float | tuple[float, float],
+        max_connections: int,
+    ):
+        super().__init__()
+        self.timeout = timeout
+        self.client = httpx.Client(
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+
+    @staticmethod
+    def _get_timeout(timeout: float | tuple[float, float]) -> httpx.Timeout:
+        if isinstance(timeout, tuple):
+            connect_timeout, read_timeout = timeout
+            return httpx.Timeout(read_timeout, connect=connect_timeout)
+        return httpx.Timeout(timeout)
+
+    def send(
+        self,
+        request: requests.PreparedRequest,
+        stream: bool = False,
+        timeout: float | tuple[float, float] = None,
+        verify: bool = True,
+        cert: str = None,
+        proxies: dict = None,
+    ) -> requests.Response:
+        httpx_request = httpx.Request(
+            request.method,
+            request.url,
+            headers=[
+                (key, value)
+                for key, value in request.headers.items()
+                if key.lower() not in self.HOP_BY_HOP_HEADERS
+            ],
+            content=request.body,
+            extensions={
+                "timeout": self._get_timeout(
+                    timeout if timeout is not None else self.timeout
+                ).as_dict()
+            },
+        )
+        try:
+            httpx_response = self.client.send(httpx_request)
+            content = httpx_response.read()
+        except httpx.TimeoutException as e:
+            if isinstance(e, httpx.ConnectTimeout):
+                raise requests.ConnectTimeout(e, request=request)
+            raise requests.ReadTimeout(e, request=request)
+        except httpx.TransportError as e:
+            raise requests.ConnectionError(e, request=request)
+
+        response = requests.Response()
+        response.status_code = httpx_response.status_code
+        response.headers = CaseInsensitiveDict(httpx_response.headers.multi_items())
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.reason = httpx_response.reason_phrase
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.raw = Http2RawResponse(httpx_response.headers)
+        response._content = content
+        response._content_consumed = True
+        extract_cookies_to_jar(response.cookies, request, response.raw)
+        return response
+
+    def close(self):
+        self.client.close()
+
+
+class M3u8HttpClient:
+    def __init__(self, session: requests.Session):
+        self.session = session
+
+    def download(
+        self,
+        uri: str,
+        timeout: float = None,
+        headers: dict = {},
+        verify_ssl: bool = True,
+    ) -> tuple[str, str]:
+        response = self.session.get(
+            uri,
+            timeout=timeout,
+            headers=headers,
+            verify=verify_ssl,
+        )
+        response.raise_for_status()
+        return response.text, urljoin(response.url, ".")
+
+
+class Transport:
+    DEFAULT_TIMEOUT = (10, 60)
+    DEFAULT_POOL_SIZE = 10
+    ASYNC_MAX_CONNECTIONS = 64
+    HTTP2_HOSTS = (
+        "amp-api.music.apple.com",
+        "play.itunes.apple.com",
+        "aod.itunes.apple.com",
+        "mvod.itunes.apple.com",
+    )
+    POOL_SIZES = {
+        "amp-api.music.apple.com": 32,
+        "play.itunes.apple.com": 16,
+        "itunes.apple.com": 16,
+        "music.apple.com": 8,
+        "is1-ssl.mzstatic.com": 16,
+        "a1.mzstatic.com": 16,
+        "aod.itunes.apple.com": 16,
+        "mvod.itunes.apple.com": 16,
+    }
+    ENDPOINT_TIMEOUTS = {
+        ApiEndpoint.AMP_API: (5, 20),
+        ApiEndpoint.WEBPLAYBACK: (5, 20),
+        ApiEndpoint.LICENSE: (5, 30),
+        ApiEndpoint.ITUNES_LOOKUP: (5, 15),
+        ApiEndpoint.ITUNES_PAGE: (5, 20),
+        ApiEndpoint.ARTWORK: (5, 30),
+    }
+
+    def __init__(self, http2: bool = False):
+        self.http2 = http2
+        self._check_http2_dependencies()
+        self._adapters = {
+            host: self._create_adapter(
+                pool_size,
+                self.http2 and host in self.HTTP2_HOSTS,
+            )
+            for host, pool_size in self.POOL_SIZES.items()
+        }
+        self._default_adapter = self._create_adapter(self.DEFAULT_POOL_SIZE)
+        self.session = self.create_session()
+        self.m3u8_http_client = M3u8HttpClient(self.session)
+
+    def _check_http2_dependencies(self):
+        if not self.http2:
+            return
+        if httpx is None:
+            raise Exception(
+                "httpx is required for HTTP/2 support, "
+                'install it with "pip install gamdl[http2]"'
+            )
+        try:
+            import h2
+        except ImportError:
+            raise Exception(
+                "h2 is required for HTTP/2 support, "
+                'install it with "pip install gamdl[http2]"'
+            )
+
+    def _create_adapter(
+        self,
+        pool_size: int,
+        http2: bool = False,
+    ) -> HTTPAdapter | Http2Adapter:
+        if http2:
+            return Http2Adapter(self.DEFAULT_TIMEOUT, pool_size)
+        return TimeoutHTTPAdapter(
+            self.DEFAULT_TIMEOUT,
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+        )
+
+    def create_session(self) -> requests.Session:
+        session = requests.Session()
+        session.mount("https://", self._default_adapter)
+        session.mount("http://", self._default_adapter)
+        for host, adapter in self._adapters.items():
+            session.mount(f"https://{host}/", adapter)
+        return session
+
+    def get_timeout(self, endpoint: ApiEndpoint) -> tuple[float, float]:
+        return self.ENDPOINT_TIMEOUTS.get(endpoint, self.DEFAULT_TIMEOUT)
+
+    def get_async_timeout(self, endpoint: ApiEndpoint = None) -> httpx.Timeout:
+        connect_timeout, read_timeout = self.get_timeout(endpoint)
+        return httpx.Timeout(read_timeout, connect=connect_timeout)
+
+    def create_async_client(
+        self,
+        max_connections: int = ASYNC_MAX_CONNECTIONS,
+        **kwargs,
+    ) -> httpx.AsyncClient:
+        if httpx is None:
+            raise Exception(
+                "httpx is required for the async clients, "
+                'install it with "pip install gamdl[async]"'
+            )
+        return httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            timeout=self.get_async_timeout(),
+            follow_redirects=True,
+            http2=self.http2,
+            **kwargs,
+        )
+
+    def load_m3u8(self, uri: str) -> m3u8.M3U8:
+        return m3u8.load(uri, http_client=self.m3u8_http_client)
+
+
+_transport: Transport | None = None
+_transport_lock = threading.Lock()
+
+
+def get_transport() -> Transport:
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = Transport()
+        return _transport
+
+
+def set_transport(transport: Transport) -> None:
+    global _transport
+    with _transport_lock:
+        _transport = transport
@@ -1,3 +1,10 @@
+import email.utils
+import json
+import queue
+import threading
+import time
+import typing
+import weakref
 from pathlib import Path
 
 import click
@@ -6,6 +13,16 @@ import requests
 
 from .constants import X_NOT_FOUND_STRING
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
 
 def color_text(text: str, color) -> str:
     return color + text + colorama.Style.RESET_ALL
@@ -17,6 +34,30 @@ def raise_response_exception(response: requests.Response):
     )
 
 
+def parse_json(content: bytes | str) -> typing.Any:
+    if orjson is not None:
+        return orjson.loads(content)
+    if msgspec is not None:
+        try:
+            return msgspec.json.decode(content)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+    return json.loads(content)
+
+
+def get_retry_after(response: requests.Response, default: float) -> float:
+    retry_after = response.headers.get("retry-after")
+    if not retry_after:
+        return default
+    if retry_after.isdigit():
+        return float(retry_after)
+    try:
+        retry_after_date = email.utils.parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return default
+    return max(retry_after_date.timestamp() - time.time(), 0)
+
+
 def prompt_path(is_file: bool, initial_path: Path, description: str) -> Path:
     path_validator = click.Path(
         exists=True,
@@ -44,3 +85,48 @@ def prompt_path(is_file: bool, initial_path: Path, description: str) -> Path:
             path_str = path_str.strip('"')
             initial_path = Path(path_str)
     return path_obj
+
+
+def iterate_in_background(
+    iterable: typing.Iterable,
+    buffer_size: int = 1,
+) -> typing.Generator[typing.Any, None, None]:
+    items = queue.Queue(buffer_size)
+    stopped = threading.Event()
+    done = object()
+
+    def put(item: typing.Any) -> None:
+        while not stopped.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def produce() -> None:
+        try:
+            for item in iterable:
+                put((item, None))
+                if stopped.is_set():
+                    return
+        except Exception as e:
+            put((done, e))
+            return
+        put((done, None))
+
+    def consume() -> typing.Generator[typing.Any, None, None]:
+        try:
+            while True:
+                item, exception = items.get()
+                if item is done:
+                    if exception is not None:
+                        raise exception
+                    return
+                yield item
+        finally:
+            stopped.set()
+
+    threading.Thread(target=produce, daemon=True).start()
+    consumer = consume()
+    weakref.finalize(consumer, stopped.set)
+    return consumer